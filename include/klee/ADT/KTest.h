@@ -10,6 +10,8 @@
 #ifndef KLEE_KTEST_H
 #define KLEE_KTEST_H
 
+#include <stddef.h>
+
 #ifdef __cplusplus
 extern "C" {
 #endif
@@ -48,6 +50,10 @@ extern "C" {
 
   /* returns 1 on success, 0 on (unspecified) error */
   int   kTest_toFile(KTest *, const char *path);
+
+  /* serializes the KTest into a malloc'ed buffer (free it with free()),
+     returns 1 on success, 0 on (unspecified) error */
+  int   kTest_toBuffer(KTest *, char **buffer, size_t *size);
   
   /* returns total number of object bytes */
   unsigned kTest_numBytes(KTest *);
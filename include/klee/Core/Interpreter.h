@@ -47,6 +47,11 @@ public:
   virtual void processTestCase(const ExecutionState &state,
                                const char *err,
                                const char *suffix) = 0;
+
+  /// Number of test files waiting to be written
+  virtual std::uint64_t getTestQueueDepth() const = 0;
+  /// Time spent writing test files (in microseconds)
+  virtual std::uint64_t getTestWriteTime() const = 0;
 };
 
 class Interpreter {
@@ -129,6 +134,11 @@ public:
   // a user specified path. use null to reset.
   virtual void setReplayPath(const std::vector<bool> *path) = 0;
 
+  // supply a list of choices to take at the splits of the state space
+  // (see --shard-depth). the subtree they lead to is explored, paths
+  // leaving it are dropped. use null to reset.
+  virtual void setShardPrefix(const std::vector<std::uint32_t> *prefix) = 0;
+
   // supply a set of symbolic bindings that will be used as "seeds"
   // for the search. use null to reset.
   virtual void useSeeds(const std::vector<struct KTest *> *seeds) = 0;
@@ -144,6 +154,10 @@ public:
 
   virtual void setInhibitForking(bool value) = 0;
 
+  // hand over some states to other processes at the next instruction
+  // step (see --max-donated-states)
+  virtual void requestDonation() = 0;
+
   virtual void prepareForEarlyExit() = 0;
 
   /*** State accessor methods ***/
@@ -68,7 +68,8 @@ enum class StateTerminationClass : std::uint8_t {
   TTMARK(EXECERR, 61U)                                                         \
   TTYPE(Replay, 70U, "")                                                       \
   TTYPE(Merge, 71U, "")                                                        \
-  TTMARK(EARLYALGORITHM, 71U)                                                  \
+  TTYPE(Frontier, 72U, "")                                                     \
+  TTMARK(EARLYALGORITHM, 72U)                                                  \
   TTYPE(SilentExit, 80U, "")                                                   \
   TTMARK(EARLYUSER, 80U)                                                       \
   TTMARK(END, 80U)
@@ -14,6 +14,7 @@
 #include "klee/System/Time.h"
 #include "klee/Solver/SolverCmdLine.h"
 
+#include <cstdint>
 #include <memory>
 #include <string>
 #include <vector>
@@ -241,6 +242,18 @@ namespace klee {
   /// \param s - The underlying solver to use.
   std::unique_ptr<Solver> createCexCachingSolver(std::unique_ptr<Solver> s);
 
+  /// createPersistentCachingSolver - Create a solver which caches the results
+  /// of validity and counterexample queries in an SQLite database. The
+  /// database is kept across runs and can be shared by concurrent processes.
+  ///
+  /// \param s - The underlying solver to use.
+  /// \param path - The path of the database.
+  /// \param maxSize - The size in bytes beyond which the least recently used
+  /// entries are evicted (0 for no limit).
+  std::unique_ptr<Solver>
+  createPersistentCachingSolver(std::unique_ptr<Solver> s, std::string path,
+                                std::uint64_t maxSize);
+
   /// createFastCexSolver - Create a "fast counterexample solver", which tries
   /// to quickly compute a satisfying assignment for a constraint set using
   /// value propogation and range analysis.
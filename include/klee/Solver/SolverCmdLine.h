@@ -34,6 +34,10 @@ extern llvm::cl::opt<bool> UseCexCache;
 
 extern llvm::cl::opt<bool> UseBranchCache;
 
+extern llvm::cl::opt<std::string> PersistentQueryCache;
+
+extern llvm::cl::opt<unsigned> PersistentQueryCacheSize;
+
 extern llvm::cl::opt<bool> UseIndependentSolver;
 
 extern llvm::cl::opt<bool> DebugValidateSolver;
@@ -0,0 +1,83 @@
+//===-- AsyncFileWriter.h ---------------------------------------*- C++ -*-===//
+//
+//                     The KLEE Symbolic Virtual Machine
+//
+// This file is distributed under the University of Illinois Open Source
+// License. See LICENSE.TXT for details.
+//
+//===----------------------------------------------------------------------===//
+
+#pragma once
+
+#include "klee/System/Time.h"
+
+#include <atomic>
+#include <condition_variable>
+#include <cstdint>
+#include <cstdio>
+#include <deque>
+#include <mutex>
+#include <string>
+#include <thread>
+#include <utility>
+#include <vector>
+
+namespace klee {
+
+/// @brief Writes files in a background thread.
+///
+/// Files are queued with their complete contents and written by a writer
+/// thread, which takes all queued files at once and writes them as a batch.
+/// The queue is bounded: write() blocks while it is full. Files are either
+/// created in a directory or appended to a single (ustar) tar archive, which
+/// is finished when the writer is destroyed.
+///
+/// With a queue size of 0 there is no thread and files are written directly.
+class AsyncFileWriter {
+  std::string directory;
+  std::FILE *archive{nullptr};
+  std::size_t maxQueued;
+
+  std::deque<std::pair<std::string, std::string>> queue;
+  /// files taken from the queue but not written yet
+  std::size_t writing{0};
+  bool stopping{false};
+  /// names of the files that could not be written (reported by the caller)
+  std::vector<std::string> failed;
+  std::mutex lock;
+  std::condition_variable queueChanged;
+  std::thread thread;
+
+  std::atomic<std::size_t> queueDepth{0};
+  std::atomic<std::uint64_t> writeTime{0};
+
+  void run();
+  void writeBatch(std::vector<std::pair<std::string, std::string>> &batch);
+  bool writeFile(const std::string &name, const std::string &contents);
+  bool appendToArchive(const std::string &name, const std::string &contents,
+                       std::string &buffer);
+  void reportFailures();
+
+public:
+  /// Write files to directory, or into archivePath if it is not empty
+  AsyncFileWriter(std::string directory, const std::string &archivePath,
+                  std::size_t maxQueued);
+  /// Writes all queued files
+  ~AsyncFileWriter();
+  AsyncFileWriter(const AsyncFileWriter &other) = delete;
+  AsyncFileWriter(AsyncFileWriter &&other) noexcept = delete;
+  AsyncFileWriter &operator=(const AsyncFileWriter &other) = delete;
+  AsyncFileWriter &operator=(AsyncFileWriter &&other) noexcept = delete;
+
+  /// Queue the file name (relative to the directory) with contents
+  void write(std::string name, std::string contents);
+  /// Wait until all queued files are written
+  void flush();
+
+  /// Number of files waiting to be written
+  std::size_t getQueueDepth() const { return queueDepth; }
+  /// Total time spent writing files
+  time::Span getWriteTime() const;
+};
+
+} // namespace klee
@@ -175,48 +175,67 @@ KTest *kTest_fromFile(const char *path) {
   return 0;
 }
 
-int kTest_toFile(KTest *bo, const char *path) {
-  FILE *f = fopen(path, "wb");
+static int kTest_toStream(KTest *bo, FILE *f) {
   unsigned i;
 
-  if (!f) 
-    goto error;
   if (fwrite(KTEST_MAGIC, strlen(KTEST_MAGIC), 1, f)!=1)
-    goto error;
+    return 0;
   if (!write_uint32(f, KTEST_VERSION))
-    goto error;
+    return 0;
       
   if (!write_uint32(f, bo->numArgs))
-    goto error;
+    return 0;
   for (i=0; i<bo->numArgs; i++) {
     if (!write_string(f, bo->args[i]))
-      goto error;
+      return 0;
   }
 
   if (!write_uint32(f, bo->symArgvs))
-    goto error;
+    return 0;
   if (!write_uint32(f, bo->symArgvLen))
-    goto error;
+    return 0;
   
   if (!write_uint32(f, bo->numObjects))
-    goto error;
+    return 0;
   for (i=0; i<bo->numObjects; i++) {
     KTestObject *o = &bo->objects[i];
     if (!write_string(f, o->name))
-      goto error;
+      return 0;
     if (!write_uint32(f, o->numBytes))
-      goto error;
+      return 0;
     if (fwrite(o->bytes, o->numBytes, 1, f)!=1)
-      goto error;
+      return 0;
   }
 
-  fclose(f);
-
   return 1;
- error:
-  if (f) fclose(f);
-  
-  return 0;
+}
+
+int kTest_toFile(KTest *bo, const char *path) {
+  FILE *f = fopen(path, "wb");
+  int res;
+
+  if (!f) 
+    return 0;
+  res = kTest_toStream(bo, f);
+  if (fclose(f))
+    res = 0;
+  return res;
+}
+
+int kTest_toBuffer(KTest *bo, char **buffer, size_t *size) {
+  FILE *f = open_memstream(buffer, size);
+  int res;
+
+  if (!f)
+    return 0;
+  res = kTest_toStream(bo, f);
+  if (fclose(f))
+    res = 0;
+  if (!res) {
+    free(*buffer);
+    *buffer = 0;
+  }
+  return res;
 }
 
 unsigned kTest_numBytes(KTest *bo) {
@@ -77,6 +77,11 @@ namespace klee {
 
     void getSummaryStatistics(CallSiteSummaryTable &result);
 
+    /// All call paths, every path after its parent
+    const std::vector<std::unique_ptr<CallPathNode>> &getCallPaths() const {
+      return paths;
+    }
+
     CallPathNode *getCallPath(CallPathNode *parent,
                               const llvm::Instruction *callSite,
                               const llvm::Function *f);
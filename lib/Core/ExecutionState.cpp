@@ -104,6 +104,7 @@ ExecutionState::ExecutionState(const ExecutionState& state):
     constraints(state.constraints),
     pathOS(state.pathOS),
     symPathOS(state.symPathOS),
+    splitChoices(state.splitChoices),
     coveredLines(state.coveredLines),
     symbolics(state.symbolics),
     cexPreferences(state.cexPreferences),
@@ -204,6 +204,11 @@ public:
   /// taken to reach/create this state
   TreeOStream symPathOS;
 
+  /// @brief Choices taken at all splits of the state space (the side of a
+  /// fork or the case of a multi-way branch) to reach this state, only
+  /// recorded for sharded exploration (--shard-depth, --shard-prefix)
+  std::vector<std::uint32_t> splitChoices;
+
   /// @brief Set containing which lines in which files are covered by this state
   std::map<const std::string *, std::set<std::uint32_t>> coveredLines;
 
@@ -189,7 +189,7 @@ PersistentExecutionTree::PersistentExecutionTree(
 }
 
 void PersistentExecutionTree::dump(llvm::raw_ostream &os) noexcept {
-  writer.batchCommit(true);
+  writer.flush();
   InMemoryExecutionTree::dump(os);
 }
 
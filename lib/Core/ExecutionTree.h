@@ -185,6 +185,7 @@ public:
   void dump(llvm::raw_ostream &os) noexcept override;
   void setTerminationType(ExecutionState &state,
                           StateTerminationType type) override;
+  [[nodiscard]] const ExecutionTreeWriter &getWriter() const { return writer; }
 
   [[nodiscard]] ExecutionTreeType getType() const override {
     return ExecutionTreeType::Persistent;
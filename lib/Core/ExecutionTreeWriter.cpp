@@ -12,14 +12,22 @@
 #include "ExecutionTree.h"
 #include "klee/Support/ErrorHandling.h"
 #include "klee/Support/OptionCategories.h"
+#include "klee/Support/Timer.h"
 
 #include "llvm/Support/CommandLine.h"
 
 namespace {
 llvm::cl::opt<unsigned> BatchSize(
-    "exec-tree-batch-size", llvm::cl::init(100U),
+    "exec-tree-batch-size", llvm::cl::init(10000U),
     llvm::cl::desc("Number of execution tree nodes to batch for writing, "
-                   "see --write-exec-tree (default=100)"),
+                   "see --write-exec-tree (default=10000)"),
+    llvm::cl::cat(klee::ExecTreeCat));
+
+llvm::cl::opt<unsigned> QueueSize(
+    "exec-tree-queue-size", llvm::cl::init(65536U),
+    llvm::cl::desc("Maximum number of execution tree nodes waiting to be "
+                   "written by a background thread. 0 writes them while "
+                   "exploring, see --write-exec-tree (default=65536)"),
     llvm::cl::cat(klee::ExecTreeCat));
 } // namespace
 
@@ -93,9 +101,24 @@ ExecutionTreeWriter::ExecutionTreeWriter(const std::string &dbPath) {
     klee_warning("Execution tree database: cannot reset transaction: %s",
                  sqlite3_errmsg(db));
   }
+
+  if (QueueSize) {
+    queue.reserve(QueueSize);
+    thread = std::thread(&ExecutionTreeWriter::run, this);
+  }
 }
 
 ExecutionTreeWriter::~ExecutionTreeWriter() {
+  // write the remaining nodes
+  if (thread.joinable()) {
+    {
+      std::lock_guard<std::mutex> guard(lock);
+      stopping = true;
+    }
+    queueChanged.notify_all();
+    thread.join();
+  }
+
   batchCommit(!flushed);
 
   // finalize prepared statements
@@ -114,85 +137,213 @@ ExecutionTreeWriter::~ExecutionTreeWriter() {
     klee_warning("Execution tree database: cannot close database: %s",
                  sqlite3_errmsg(db));
   }
+
+  reportErrors();
 }
 
 void ExecutionTreeWriter::batchCommit(bool force) {
   ++batch;
-  if (batch < BatchSize && !force)
+  if (broken || (batch < BatchSize && !force))
     return;
 
   // commit and begin transaction
   if (sqlite3_step(transactionCommitStmt) != SQLITE_DONE) {
-    klee_warning("Execution tree database: transaction commit error: %s",
-                 sqlite3_errmsg(db));
+    recordError(std::string("Execution tree database: transaction commit "
+                            "error: ") +
+                sqlite3_errmsg(db));
   }
 
   if (sqlite3_reset(transactionCommitStmt) != SQLITE_OK) {
-    klee_warning("Execution tree database: transaction reset error: %s",
-                 sqlite3_errmsg(db));
+    recordError(std::string("Execution tree database: transaction reset "
+                            "error: ") +
+                sqlite3_errmsg(db));
   }
 
   if (sqlite3_step(transactionBeginStmt) != SQLITE_DONE) {
-    klee_warning("Execution tree database: transaction begin error: %s",
-                 sqlite3_errmsg(db));
+    recordError(std::string("Execution tree database: transaction begin "
+                            "error: ") +
+                sqlite3_errmsg(db));
   }
 
   if (sqlite3_reset(transactionBeginStmt) != SQLITE_OK) {
-    klee_warning("Execution tree database: transaction reset error: %s",
-                 sqlite3_errmsg(db));
+    recordError(std::string("Execution tree database: transaction reset "
+                            "error: ") +
+                sqlite3_errmsg(db));
   }
 
   batch = 0;
   flushed = true;
 }
 
-void ExecutionTreeWriter::write(const AnnotatedExecutionTreeNode &node) {
+void ExecutionTreeWriter::run() {
+  std::vector<NodeRecord> nodes;
+  nodes.reserve(QueueSize);
+  for (;;) {
+    bool commit = false;
+    {
+      std::unique_lock<std::mutex> guard(lock);
+      queueChanged.wait(guard, [this] {
+        return stopping || flushRequested || !queue.empty();
+      });
+      if (queue.empty() && stopping)
+        return;
+      commit = queue.empty();
+      nodes.swap(queue);
+      writing = nodes.size();
+      queueDepth = writing;
+    }
+    // the queue has space again
+    queueChanged.notify_all();
+
+    WallTimer timer;
+    for (const auto &record : nodes)
+      insert(record);
+    nodes.clear();
+    if (commit)
+      batchCommit(true);
+    writeTime += timer.delta().toMicroseconds();
+
+    {
+      std::lock_guard<std::mutex> guard(lock);
+      writing = 0;
+      queueDepth = queue.size();
+      if (commit)
+        flushRequested = false;
+    }
+    queueChanged.notify_all();
+  }
+}
+
+void ExecutionTreeWriter::flush() {
+  if (!thread.joinable()) {
+    batchCommit(true);
+    reportErrors();
+    return;
+  }
+
+  {
+    std::unique_lock<std::mutex> guard(lock);
+    flushRequested = true;
+    queueChanged.notify_all();
+    queueChanged.wait(guard, [this] { return !flushRequested; });
+  }
+  reportErrors();
+}
+
+void ExecutionTreeWriter::recordError(const std::string &message, bool fatal) {
+  std::lock_guard<std::mutex> guard(lock);
+  if (fatal) {
+    broken = true;
+    if (fatalError.empty())
+      fatalError = message;
+  } else {
+    warnings.push_back(message);
+  }
+  errorsRecorded = true;
+}
+
+void ExecutionTreeWriter::reportErrors() {
+  if (!errorsRecorded)
+    return;
+
+  std::vector<std::string> messages;
+  std::string fatal;
+  {
+    std::lock_guard<std::mutex> guard(lock);
+    messages.swap(warnings);
+    fatal = fatalError;
+    errorsRecorded = false;
+  }
+  for (const auto &message : messages)
+    klee_warning("%s", message.c_str());
+  if (!fatal.empty())
+    klee_error("%s", fatal.c_str());
+}
+
+void ExecutionTreeWriter::insert(const NodeRecord &record) {
+  if (broken)
+    return;
+
   unsigned rc = 0;
 
   // bind values (SQLITE_OK is defined as 0 - just check success once at the
   // end)
-  rc |= sqlite3_bind_int64(insertStmt, 1, node.id);
-  rc |= sqlite3_bind_int(insertStmt, 2, node.stateID);
-  rc |= sqlite3_bind_int64(
-      insertStmt, 3,
-      node.left.getPointer()
-          ? (static_cast<AnnotatedExecutionTreeNode *>(node.left.getPointer()))->id
-          : 0);
-  rc |= sqlite3_bind_int64(
-      insertStmt, 4,
-      node.right.getPointer()
-          ? (static_cast<AnnotatedExecutionTreeNode *>(node.right.getPointer()))->id
-          : 0);
-  rc |= sqlite3_bind_int(insertStmt, 5, node.asmLine);
-  std::uint8_t value{0};
-  if (std::holds_alternative<BranchType>(node.kind)) {
-    value = static_cast<std::uint8_t>(std::get<BranchType>(node.kind));
-  } else if (std::holds_alternative<StateTerminationType>(node.kind)) {
-    value =
-        static_cast<std::uint8_t>(std::get<StateTerminationType>(node.kind));
-  } else {
-    assert(false && "ExecutionTreeWriter: Illegal node kind!");
-  }
-  rc |= sqlite3_bind_int(insertStmt, 6, value);
+  rc |= sqlite3_bind_int64(insertStmt, 1, record.id);
+  rc |= sqlite3_bind_int(insertStmt, 2, record.stateID);
+  rc |= sqlite3_bind_int64(insertStmt, 3, record.leftID);
+  rc |= sqlite3_bind_int64(insertStmt, 4, record.rightID);
+  rc |= sqlite3_bind_int(insertStmt, 5, record.asmLine);
+  rc |= sqlite3_bind_int(insertStmt, 6, record.kind);
   if (rc != SQLITE_OK) {
     // This is either a programming error (e.g. SQLITE_MISUSE) or we ran out of
     // resources (e.g. SQLITE_NOMEM). Calling sqlite3_errmsg() after a possible
     // successful call above is undefined, hence no error message here.
-    klee_error("Execution tree database: cannot persist data for node: %u",
-               node.id);
+    recordError("Execution tree database: cannot persist data for node: " +
+                    std::to_string(record.id),
+                true);
+    return;
   }
 
   // insert
   if (sqlite3_step(insertStmt) != SQLITE_DONE) {
-    klee_warning(
-        "Execution tree database: cannot persist data for node: %u: %s",
-        node.id, sqlite3_errmsg(db));
+    recordError("Execution tree database: cannot persist data for node: " +
+                std::to_string(record.id) + ": " + sqlite3_errmsg(db));
   }
 
   if (sqlite3_reset(insertStmt) != SQLITE_OK) {
-    klee_warning("Execution tree database: error reset node: %u: %s", node.id,
-                 sqlite3_errmsg(db));
+    recordError("Execution tree database: error reset node: " +
+                std::to_string(record.id) + ": " + sqlite3_errmsg(db));
   }
 
   batchCommit();
 }
+
+void ExecutionTreeWriter::write(const AnnotatedExecutionTreeNode &node) {
+  NodeRecord record;
+  record.id = node.id;
+  record.stateID = node.stateID;
+  record.leftID =
+      node.left.getPointer()
+          ? (static_cast<AnnotatedExecutionTreeNode *>(node.left.getPointer()))->id
+          : 0;
+  record.rightID =
+      node.right.getPointer()
+          ? (static_cast<AnnotatedExecutionTreeNode *>(node.right.getPointer()))->id
+          : 0;
+  record.asmLine = node.asmLine;
+  record.kind = 0;
+  if (std::holds_alternative<BranchType>(node.kind)) {
+    record.kind = static_cast<std::uint8_t>(std::get<BranchType>(node.kind));
+  } else if (std::holds_alternative<StateTerminationType>(node.kind)) {
+    record.kind =
+        static_cast<std::uint8_t>(std::get<StateTerminationType>(node.kind));
+  } else {
+    assert(false && "ExecutionTreeWriter: Illegal node kind!");
+  }
+
+  if (!thread.joinable()) {
+    WallTimer timer;
+    insert(record);
+    writeTime += timer.delta().toMicroseconds();
+    reportErrors();
+    return;
+  }
+
+  bool wasEmpty;
+  {
+    std::unique_lock<std::mutex> guard(lock);
+    if (queue.size() >= QueueSize) {
+      // backpressure: wait for the writer
+      WallTimer timer;
+      queueChanged.wait(guard, [this] { return queue.size() < QueueSize; });
+      stallTime += timer.delta().toMicroseconds();
+    }
+    wasEmpty = queue.empty();
+    queue.push_back(record);
+    queueDepth = queue.size() + writing;
+  }
+  // the writer only waits for an empty queue
+  if (wasEmpty)
+    queueChanged.notify_all();
+  reportErrors();
+}
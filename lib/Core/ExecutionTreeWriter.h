@@ -9,27 +9,79 @@
 
 #pragma once
 
+#include "klee/System/Time.h"
+
 #include <sqlite3.h>
 
+#include <atomic>
+#include <condition_variable>
 #include <cstdint>
+#include <mutex>
 #include <string>
+#include <thread>
+#include <vector>
 
 namespace klee {
 class AnnotatedExecutionTreeNode;
 
 /// @brief Writes execution tree nodes into an SQLite database
+///
+/// Nodes are copied into a bounded queue and inserted by a writer thread in
+/// transactions of --exec-tree-batch-size nodes. Exploration only waits for
+/// the writer when the queue is full.
 class ExecutionTreeWriter {
   friend class PersistentExecutionTree;
 
+  /// Columns of a node in the database
+  struct NodeRecord {
+    std::uint32_t id;
+    std::uint32_t stateID;
+    std::uint32_t leftID;
+    std::uint32_t rightID;
+    std::uint32_t asmLine;
+    std::uint8_t kind;
+  };
+
   ::sqlite3 *db{nullptr};
   ::sqlite3_stmt *insertStmt{nullptr};
   ::sqlite3_stmt *transactionBeginStmt{nullptr};
   ::sqlite3_stmt *transactionCommitStmt{nullptr};
   std::uint32_t batch{0};
   bool flushed{true};
+  /// set after an error that stops writing (by the thread inserting nodes)
+  bool broken{false};
+
+  std::vector<NodeRecord> queue;
+  /// nodes taken from the queue but not inserted yet
+  std::size_t writing{0};
+  bool flushRequested{false};
+  bool stopping{false};
+  /// errors of the writer thread, reported by the main thread
+  std::vector<std::string> warnings;
+  std::string fatalError;
+  std::atomic<bool> errorsRecorded{false};
+  std::mutex lock;
+  std::condition_variable queueChanged;
+  std::thread thread;
+
+  std::atomic<std::size_t> queueDepth{0};
+  /// time spent inserting nodes and committing (in microseconds)
+  std::atomic<std::uint64_t> writeTime{0};
+  /// time exploration waited for space in the queue (in microseconds)
+  std::atomic<std::uint64_t> stallTime{0};
 
   /// Writes nodes in batches
   void batchCommit(bool force = false);
+  /// Inserts queued nodes (writer thread)
+  void run();
+  void insert(const NodeRecord &record);
+  /// Commits all written nodes
+  void flush();
+  /// Records an error to be reported by reportErrors(), a fatal one stops
+  /// writing
+  void recordError(const std::string &message, bool fatal = false);
+  /// Prints the recorded errors, exits after a fatal one (main thread)
+  void reportErrors();
 
 public:
   explicit ExecutionTreeWriter(const std::string &dbPath);
@@ -41,6 +93,13 @@ public:
 
   /// Write new node into database
   void write(const AnnotatedExecutionTreeNode &node);
+
+  /// Number of nodes waiting to be written
+  std::size_t getQueueDepth() const { return queueDepth; }
+  /// Time spent writing nodes
+  time::Span getWriteTime() const { return time::microseconds(writeTime); }
+  /// Time exploration was blocked by a full queue
+  time::Span getStallTime() const { return time::microseconds(stallTime); }
 };
 
 } // namespace klee
@@ -358,6 +358,24 @@ cl::opt<unsigned> MaxDepth(
     cl::init(0),
     cl::cat(TerminationCat));
 
+cl::opt<unsigned> ShardDepth(
+    "shard-depth",
+    cl::desc("Stop states after this many splits of the state space (forks "
+             "and multi-way branches) and write the choices leading to them "
+             "to the frontier file, to be explored by other processes with "
+             "--shard-prefix (see klee-parallel).  Set to 0 to disable "
+             "(default=0)"),
+    cl::init(0),
+    cl::cat(TerminationCat));
+
+cl::opt<unsigned> MaxDonatedStates(
+    "max-donated-states",
+    cl::desc("Number of states handed over to other processes when asked "
+             "to (SIGUSR1 with --shard-prefix, see klee-parallel): the "
+             "shallowest ones, at most all but one (default=1)"),
+    cl::init(1),
+    cl::cat(TerminationCat));
+
 cl::opt<unsigned> MaxMemory("max-memory",
                             cl::desc("Refuse to fork when above this amount of "
                                      "memory (in MB) (see -max-memory-inhibit) and terminate "
@@ -483,9 +501,9 @@ Executor::Executor(LLVMContext &ctx, const InterpreterOptions &opts,
     : Interpreter(opts), interpreterHandler(ih), searcher(0),
       externalDispatcher(new ExternalDispatcher(ctx)), statsTracker(0),
       pathWriter(0), symPathWriter(0), specialFunctionHandler(0), timers{time::Span(TimerInterval)},
-      replayKTest(0), replayPath(0), usingSeeds(0),
+      replayKTest(0), replayPath(0), shardPrefix(0), usingSeeds(0),
       atMemoryLimit(false), inhibitForking(false), haltExecution(false),
-      ivcEnabled(false), debugLogBuffer(debugBufferString) {
+      donationRequested(false), ivcEnabled(false), debugLogBuffer(debugBufferString) {
 
 
   const time::Span maxTime{MaxTime};
@@ -903,7 +921,18 @@ void Executor::branch(ExecutionState &state,
   unsigned N = conditions.size();
   assert(N);
 
-  if (!branchingPermitted(state)) {
+  if (shardPrefix && state.splitChoices.size() < shardPrefix->size()) {
+    // follow the shard prefix instead of branching
+    const std::uint32_t choice = (*shardPrefix)[state.splitChoices.size()];
+    for (unsigned i=0; i<N; ++i)
+      result.push_back(i == choice ? &state : nullptr);
+    if (choice >= N) {
+      terminateStateEarlyAlgorithm(state, "Diverged from shard prefix",
+                                   StateTerminationType::Replay);
+      return;
+    }
+    state.splitChoices.push_back(choice);
+  } else if (!branchingPermitted(state)) {
     unsigned next = theRNG.getInt32() % N;
     for (unsigned i=0; i<N; ++i) {
       if (i == next) {
@@ -926,6 +955,9 @@ void Executor::branch(ExecutionState &state,
       result.push_back(ns);
       executionTree->attach(es->executionTreeNode, ns, es, reason);
     }
+    if (ShardDepth || shardPrefix)
+      for (unsigned i=0; i<N; ++i)
+        result[i]->splitChoices.push_back(i);
   }
 
   // If necessary redistribute seeds to match conditions, killing
@@ -975,6 +1007,15 @@ void Executor::branch(ExecutionState &state,
     }
   }
 
+  if (ShardDepth) {
+    for (unsigned i=0; i<N; ++i) {
+      if (result[i] && ShardDepth <= result[i]->splitChoices.size()) {
+        terminateStateOnFrontier(*result[i]);
+        result[i] = nullptr;
+      }
+    }
+  }
+
   for (unsigned i=0; i<N; ++i)
     if (result[i])
       addConstraint(*result[i], conditions[i]);
@@ -1079,6 +1120,23 @@ Executor::StatePair Executor::fork(ExecutionState &current, ref<Expr> condition,
           addConstraint(current, Expr::createIsZero(condition));
         }
       }
+    } else if (shardPrefix && res == Solver::Unknown &&
+               current.splitChoices.size() < shardPrefix->size()) {
+      // follow the shard prefix instead of forking
+      const std::uint32_t choice = (*shardPrefix)[current.splitChoices.size()];
+      if (choice > 1) {
+        terminateStateEarlyAlgorithm(current, "Diverged from shard prefix",
+                                     StateTerminationType::Replay);
+        return StatePair(nullptr, nullptr);
+      }
+      current.splitChoices.push_back(choice);
+      if (choice) {
+        addConstraint(current, condition);
+        res = Solver::True;
+      } else {
+        addConstraint(current, Expr::createIsZero(condition));
+        res = Solver::False;
+      }
     } else if (res==Solver::Unknown) {
       assert(!replayKTest && "in replay mode, only one branch can be true.");
       
@@ -1160,6 +1218,11 @@ Executor::StatePair Executor::fork(ExecutionState &current, ref<Expr> condition,
     falseState = trueState->branch();
     addedStates.push_back(falseState);
 
+    if (ShardDepth || shardPrefix) {
+      trueState->splitChoices.push_back(1);
+      falseState->splitChoices.push_back(0);
+    }
+
     if (it != seedMap.end()) {
       std::vector<SeedInfo> seeds = it->second;
       it->second.clear();
@@ -1218,6 +1281,12 @@ Executor::StatePair Executor::fork(ExecutionState &current, ref<Expr> condition,
     addConstraint(*trueState, condition);
     addConstraint(*falseState, Expr::createIsZero(condition));
 
+    if (ShardDepth && ShardDepth <= trueState->splitChoices.size()) {
+      terminateStateOnFrontier(*trueState);
+      terminateStateOnFrontier(*falseState);
+      return StatePair(nullptr, nullptr);
+    }
+
     // Kinda gross, do we even really still want this option?
     if (MaxDepth && MaxDepth<=trueState->depth) {
       terminateStateEarly(*trueState, "max-depth exceeded.", StateTerminationType::MaxDepth);
@@ -3600,9 +3669,36 @@ void Executor::doDumpStates() {
   updateStates(nullptr);
 }
 
+void Executor::donateStates() {
+  donationRequested = false;
+  if (states.size() < 2 || !shardPrefix)
+    return;
+
+  // Every donated state is replayed from the root by a new process, so only
+  // hand over a few states: the shallowest ones, with the largest subtrees.
+  const std::size_t count =
+      std::min<std::size_t>(MaxDonatedStates, states.size() - 1);
+  if (!count)
+    return;
+  std::vector<ExecutionState *> arr(states.begin(), states.end());
+  std::partial_sort(arr.begin(), arr.begin() + count, arr.end(),
+                    [](const ExecutionState *a, const ExecutionState *b) {
+                      if (a->splitChoices.size() != b->splitChoices.size())
+                        return a->splitChoices.size() < b->splitChoices.size();
+                      return a->getID() < b->getID();
+                    });
+  for (std::size_t i = 0; i < count; ++i)
+    terminateStateOnFrontier(*arr[i]);
+  frontierFile->flush();
+  klee_message("donated %zu of %zu states", count, arr.size());
+}
+
 void Executor::run(ExecutionState &initialState) {
   bindModuleConstants();
 
+  if (ShardDepth && shardPrefix)
+    klee_error("--shard-depth cannot be combined with --shard-prefix");
+
   // Delay init till now so that ticks don't accrue during optimization and such.
   timers.reset();
 
@@ -3695,6 +3791,11 @@ void Executor::run(ExecutionState &initialState) {
       // update searchers when states were terminated early due to memory pressure
       updateStates(nullptr);
     }
+
+    if (donationRequested) {
+      donateStates();
+      updateStates(nullptr);
+    }
   }
 
   delete searcher;
@@ -3827,6 +3928,21 @@ void Executor::terminateStateEarly(ExecutionState &state, const Twine &message,
   terminateState(state, reason);
 }
 
+void Executor::terminateStateOnFrontier(ExecutionState &state) {
+  if (!frontierFile) {
+    frontierFile = interpreterHandler->openOutputFile("frontier");
+    if (!frontierFile)
+      klee_error("Cannot open frontier file");
+  }
+  const auto &choices = state.splitChoices;
+  for (std::size_t i = 0; i < choices.size(); ++i)
+    *frontierFile << (i ? " " : "") << choices[i];
+  *frontierFile << "\n";
+
+  terminateStateEarlyAlgorithm(state, "Reached shard frontier",
+                               StateTerminationType::Frontier);
+}
+
 void Executor::terminateStateEarlyAlgorithm(ExecutionState &state,
                                             const llvm::Twine &message,
                                             StateTerminationType reason) {
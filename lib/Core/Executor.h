@@ -32,6 +32,7 @@
 #include "llvm/ADT/Twine.h"
 #include "llvm/Support/raw_ostream.h"
 
+#include <atomic>
 #include <map>
 #include <memory>
 #include <set>
@@ -160,6 +161,10 @@ private:
   /// object.
   unsigned replayPosition;
 
+  /// When non-null the choices to take at the splits of the state space
+  /// before exploring, see --shard-prefix.
+  const std::vector<std::uint32_t> *shardPrefix;
+
   /// When non-null a list of "seed" inputs which will be used to
   /// drive execution.
   const std::vector<struct KTest *> *usingSeeds;  
@@ -175,6 +180,14 @@ private:
   /// step.
   bool haltExecution;  
 
+  /// Signals the executor to hand over states to other processes at the
+  /// next instruction step, set from a signal handler. \see donateStates()
+  std::atomic<bool> donationRequested;
+
+  /// The split choices of the states stopped at the shard frontier or
+  /// donated to other processes, one state per line
+  std::unique_ptr<llvm::raw_fd_ostream> frontierFile;
+
   /// Whether implied-value concretization is enabled. Currently
   /// false, it is buggy (it needs to validate its writes).
   bool ivcEnabled;
@@ -435,6 +448,10 @@ private:
                                     const llvm::Twine &message,
                                     StateTerminationType reason);
 
+  /// Stop exploring state and write its split choices to the frontier file,
+  /// for another process to explore the subtree below it
+  void terminateStateOnFrontier(ExecutionState &state);
+
   /// Call exit handler and terminate state early
   /// (e.g. due to klee_silent_exit issued by user)
   void terminateStateEarlyUser(ExecutionState &state,
@@ -505,6 +522,9 @@ private:
   void printDebugInstructions(ExecutionState &state);
   void doDumpStates();
 
+  /// Hand over the shallowest states to other processes (--shard-prefix)
+  void donateStates();
+
   /// Only for debug purposes; enable via debugger or klee-control
   void dumpStates();
   void dumpExecutionTree();
@@ -536,6 +556,10 @@ public:
     replayPosition = 0;
   }
 
+  void setShardPrefix(const std::vector<std::uint32_t> *prefix) override {
+    shardPrefix = prefix;
+  }
+
   llvm::Module *setModule(std::vector<std::unique_ptr<llvm::Module>> &modules,
                           const ModuleOptions &opts) override;
 
@@ -552,6 +576,8 @@ public:
 
   void setInhibitForking(bool value) override { inhibitForking = value; }
 
+  void requestDonation() override { donationRequested = true; }
+
   void prepareForEarlyExit() override;
 
   /*** State accessor methods ***/
@@ -0,0 +1,147 @@
+//===-- StatsPublisher.cpp ------------------------------------------------===//
+//
+//                     The KLEE Symbolic Virtual Machine
+//
+// This file is distributed under the University of Illinois Open Source
+// License. See LICENSE.TXT for details.
+//
+//===----------------------------------------------------------------------===//
+
+#include "StatsPublisher.h"
+
+#include "klee/Support/ErrorHandling.h"
+
+#include <cerrno>
+#include <csignal>
+#include <cstring>
+#include <fcntl.h>
+#include <sys/socket.h>
+#include <sys/stat.h>
+#include <sys/un.h>
+#include <unistd.h>
+
+using namespace klee;
+
+#ifndef MSG_NOSIGNAL
+#define MSG_NOSIGNAL 0
+#endif
+
+static bool setNonBlocking(int fd) {
+  int flags = fcntl(fd, F_GETFL);
+  return flags != -1 && fcntl(fd, F_SETFL, flags | O_NONBLOCK) != -1 &&
+         fcntl(fd, F_SETFD, FD_CLOEXEC) != -1;
+}
+
+StatsPublisher::StatsPublisher(Kind kind, std::string path, int fd)
+    : kind(kind), path(std::move(path)), fd(fd) {}
+
+std::unique_ptr<StatsPublisher>
+StatsPublisher::create(Kind kind, const std::string &path) {
+  // remove a socket or FIFO left behind by a previous run
+  ::unlink(path.c_str());
+
+  if (kind == Kind::Fifo) {
+    if (::mkfifo(path.c_str(), 0600) != 0) {
+      klee_warning("Cannot create stats FIFO %s: %s", path.c_str(),
+                   strerror(errno));
+      return nullptr;
+    }
+    return std::unique_ptr<StatsPublisher>(new StatsPublisher(kind, path, -1));
+  }
+
+  sockaddr_un addr{};
+  if (path.size() >= sizeof(addr.sun_path)) {
+    klee_warning("Cannot create stats socket %s: path too long", path.c_str());
+    return nullptr;
+  }
+  addr.sun_family = AF_UNIX;
+  std::strncpy(addr.sun_path, path.c_str(), sizeof(addr.sun_path) - 1);
+
+  int fd = ::socket(AF_UNIX, SOCK_STREAM, 0);
+  if (fd == -1 || !setNonBlocking(fd) ||
+      ::bind(fd, reinterpret_cast<sockaddr *>(&addr), sizeof(addr)) != 0 ||
+      ::listen(fd, 16) != 0) {
+    klee_warning("Cannot create stats socket %s: %s", path.c_str(),
+                 strerror(errno));
+    if (fd != -1)
+      ::close(fd);
+    return nullptr;
+  }
+  return std::unique_ptr<StatsPublisher>(new StatsPublisher(kind, path, fd));
+}
+
+StatsPublisher::~StatsPublisher() {
+  for (int client : clients)
+    ::close(client);
+  if (fd != -1)
+    ::close(fd);
+  ::unlink(path.c_str());
+}
+
+void StatsPublisher::acceptClients() {
+  for (;;) {
+    int client = ::accept(fd, nullptr, nullptr);
+    if (client == -1)
+      return;
+    if (!setNonBlocking(client)) {
+      ::close(client);
+      continue;
+    }
+#ifdef SO_NOSIGPIPE
+    int one = 1;
+    ::setsockopt(client, SOL_SOCKET, SO_NOSIGPIPE, &one, sizeof(one));
+#endif
+    clients.push_back(client);
+  }
+}
+
+bool StatsPublisher::writeAll(int out, const std::string &line) {
+  const char *data = line.data();
+  std::size_t left = line.size();
+  while (left) {
+    ssize_t n = kind == Kind::Socket ? ::send(out, data, left, MSG_NOSIGNAL)
+                                     : ::write(out, data, left);
+    if (n < 0 && errno == EINTR)
+      continue;
+    // the reader is gone or does not keep up
+    if (n <= 0)
+      return false;
+    data += n;
+    left -= n;
+  }
+  return true;
+}
+
+void StatsPublisher::publish(const std::string &line) {
+  if (kind == Kind::Socket) {
+    acceptClients();
+    for (auto it = clients.begin(); it != clients.end();) {
+      if (writeAll(*it, line)) {
+        ++it;
+      } else {
+        ::close(*it);
+        it = clients.erase(it);
+      }
+    }
+    return;
+  }
+
+  // opening a FIFO for writing without blocking fails until it has a reader
+  if (fd == -1) {
+    fd = ::open(path.c_str(), O_WRONLY | O_NONBLOCK);
+    if (fd == -1)
+      return;
+    ::fcntl(fd, F_SETFD, FD_CLOEXEC);
+  }
+  struct sigaction ignore {}, old {};
+  ignore.sa_handler = SIG_IGN;
+  ::sigaction(SIGPIPE, &ignore, &old);
+  bool ok = writeAll(fd, line);
+  ::sigaction(SIGPIPE, &old, nullptr);
+  if (!ok) {
+    ::close(fd);
+    fd = -1;
+  }
+}
+
+void StatsPublisher::finish() { publish("{\"Done\":1}\n"); }
@@ -0,0 +1,59 @@
+//===-- StatsPublisher.h ----------------------------------------*- C++ -*-===//
+//
+//                     The KLEE Symbolic Virtual Machine
+//
+// This file is distributed under the University of Illinois Open Source
+// License. See LICENSE.TXT for details.
+//
+//===----------------------------------------------------------------------===//
+
+#pragma once
+
+#include <memory>
+#include <string>
+#include <vector>
+
+namespace klee {
+
+/// @brief Publishes lines (the rows of run.stats as JSON) to live readers
+/// through a Unix domain socket or a named pipe.
+///
+/// Publishing never blocks KLEE: a socket accepts any number of readers,
+/// a FIFO is opened once a reader has opened it, and readers that cannot
+/// keep up are disconnected (they can reconnect).
+class StatsPublisher {
+public:
+  enum class Kind { None, Socket, Fifo };
+
+private:
+  Kind kind;
+  std::string path;
+  /// listening socket or FIFO opened for writing (-1 while it has no reader)
+  int fd{-1};
+  std::vector<int> clients;
+
+  StatsPublisher(Kind kind, std::string path, int fd);
+
+  void acceptClients();
+  bool writeAll(int fd, const std::string &line);
+
+public:
+  /// Create the socket or FIFO at path, returns nullptr (after a warning) if
+  /// that fails
+  static std::unique_ptr<StatsPublisher> create(Kind kind,
+                                                const std::string &path);
+  ~StatsPublisher();
+  StatsPublisher(const StatsPublisher &other) = delete;
+  StatsPublisher(StatsPublisher &&other) noexcept = delete;
+  StatsPublisher &operator=(const StatsPublisher &other) = delete;
+  StatsPublisher &operator=(StatsPublisher &&other) noexcept = delete;
+
+  /// Send line (including its newline) to all connected readers
+  void publish(const std::string &line);
+
+  /// Send the terminal record, which tells readers that KLEE finished
+  /// cleanly and run.stats is complete
+  void finish();
+};
+
+} // namespace klee
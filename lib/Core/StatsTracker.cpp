@@ -19,11 +19,13 @@
 #include "klee/Solver/SolverStats.h"
 #include "klee/Statistics/Statistics.h"
 #include "klee/Support/ErrorHandling.h"
+#include "klee/Support/FileHandling.h"
 #include "klee/Support/ModuleUtil.h"
 #include "klee/System/MemoryUsage.h"
 
 #include "CallPathManager.h"
 #include "CoreStats.h"
+#include "ExecutionTree.h"
 #include "Executor.h"
 #include "MemoryManager.h"
 #include "UserSearcher.h"
@@ -46,7 +48,13 @@ DISABLE_WARNING_DEPRECATED_DECLARATIONS
 #include "llvm/Support/Process.h"
 DISABLE_WARNING_POP
 
+#include <cinttypes>
+#include <cstring>
 #include <fstream>
+#include <functional>
+#include <queue>
+#include <unordered_map>
+#include <unordered_set>
 #include <unistd.h>
 
 using namespace klee;
@@ -93,6 +101,20 @@ cl::opt<unsigned> StatsWriteAfterInstructions(
                "-stats-write-after-instructions. (default=0)"),
       cl::cat(StatsCat));
 
+cl::opt<StatsPublisher::Kind> StatsPush(
+    "stats-push",
+    cl::desc("Publish every row written to run.stats as a line of JSON for "
+             "live readers such as klee-stats --follow (default=none)"),
+    cl::values(clEnumValN(StatsPublisher::Kind::None, "none",
+                          "Do not publish statistics (default)"),
+               clEnumValN(StatsPublisher::Kind::Socket, "socket",
+                          "Unix domain socket run.stats.sock in the output "
+                          "directory, for any number of readers"),
+               clEnumValN(StatsPublisher::Kind::Fifo, "fifo",
+                          "Named pipe run.stats.fifo in the output directory, "
+                          "for a single reader")),
+    cl::init(StatsPublisher::Kind::None), cl::cat(StatsCat));
+
 cl::opt<std::string> IStatsWriteInterval(
     "istats-write-interval", cl::init("10s"),
     cl::desc(
@@ -111,17 +133,30 @@ cl::opt<std::string> UncoveredUpdateInterval(
     cl::desc("Update interval for uncovered instructions (default=30s)"),
     cl::cat(StatsCat));
 
+cl::opt<bool> DebugValidateReachableUncovered(
+    "debug-validate-reachable-uncovered", cl::init(false),
+    cl::desc("Cross-check the incremental update of the distances to "
+             "uncovered instructions against a full recomputation "
+             "(default=false)"),
+    cl::cat(StatsCat));
+
 cl::opt<bool> UseCallPaths("use-call-paths", cl::init(true),
                            cl::desc("Enable calltree tracking for instruction "
                                     "level statistics (default=true)"),
                            cl::cat(StatsCat));
 
+cl::opt<bool> OutputCallPathProfile(
+    "output-call-path-profile", cl::init(false),
+    cl::desc("Write instructions, forks, solver time and states of every call "
+             "path to run.callpaths, together with istats (default=false)"),
+    cl::cat(StatsCat));
+
 } // namespace klee
 
 ///
 
 bool StatsTracker::useStatistics() {
-  return OutputStats || OutputIStats;
+  return OutputStats || OutputIStats || StatsPush != StatsPublisher::Kind::None;
 }
 
 bool StatsTracker::useIStats() {
@@ -182,6 +217,10 @@ StatsTracker::StatsTracker(Executor &_executor, std::string _objectFilename,
         "--istats-write-after-instructions cannot be enabled at the same "
         "time.");
 
+  if (OutputCallPathProfile && !(OutputIStats && UseCallPaths))
+    klee_error("--output-call-path-profile requires --output-istats and "
+               "--use-call-paths.");
+
   KModule *km = executor.kmodule.get();
   if(CommitEvery > 0) {
       statsCommitEvery = CommitEvery;
@@ -265,7 +304,18 @@ StatsTracker::StatsTracker(Executor &_executor, std::string _objectFilename,
       klee_warning("Can't begin transaction: %s", sqlite3_errmsg(statsFile));
     }
     sqlite3_reset(transactionBeginStmt);
+  }
+
+  if (StatsPush == StatsPublisher::Kind::Socket)
+    statsPublisher = StatsPublisher::create(
+        StatsPush, executor.interpreterHandler->getOutputFilename(
+                       "run.stats.sock"));
+  else if (StatsPush == StatsPublisher::Kind::Fifo)
+    statsPublisher = StatsPublisher::create(
+        StatsPush, executor.interpreterHandler->getOutputFilename(
+                       "run.stats.fifo"));
 
+  if (statsFile || statsPublisher) {
     writeStatsLine();
 
     if (statsWriteInterval)
@@ -307,10 +357,13 @@ StatsTracker::~StatsTracker() {
     sqlite3_finalize(insertStmt);
     sqlite3_close(statsFile);
   }
+  // only now run.stats has all rows
+  if (statsPublisher)
+    statsPublisher->finish();
 }
 
 void StatsTracker::done() {
-  if (statsFile)
+  if (statsFile || statsPublisher)
     writeStatsLine();
 
   if (OutputIStats) {
@@ -363,11 +416,13 @@ void StatsTracker::stepInstruction(ExecutionState &es) {
         es.instsSinceCovNew = 1;
 	++stats::coveredInstructions;
 	stats::uncoveredInstructions += (uint64_t)-1;
+        if (updateMinDistToUncovered)
+          newlyCovered.push_back(ii.id);
       }
     }
   }
 
-  if (statsFile && StatsWriteAfterInstructions &&
+  if ((statsFile || statsPublisher) && StatsWriteAfterInstructions &&
       stats::instructions % StatsWriteAfterInstructions.getValue() == 0)
     writeStatsLine();
 
@@ -435,42 +490,21 @@ void StatsTracker::markBranchVisited(ExecutionState *visitedTrue,
 }
 
 void StatsTracker::writeStatsHeader() {
-  #undef BTYPE
-  #define BTYPE(Name,I) << "Branches" #Name " INTEGER,"
-  #undef TCLASS
-  #define TCLASS(Name,I) << "Termination" #Name " INTEGER,"
-  std::ostringstream create, insert;
-  create << "CREATE TABLE stats ("
-         << "Instructions INTEGER,"
-         << "FullBranches INTEGER,"
-         << "PartialBranches INTEGER,"
-         << "NumBranches INTEGER,"
-         << "UserTime REAL,"
-         << "NumStates INTEGER,"
-         << "MallocUsage INTEGER,"
-         << "Queries INTEGER,"
-         << "SolverQueries INTEGER,"
-         << "NumQueryConstructs INTEGER,"
-         << "WallTime REAL,"
-         << "CoveredInstructions INTEGER,"
-         << "UncoveredInstructions INTEGER,"
-         << "QueryTime INTEGER,"
-         << "SolverTime INTEGER,"
-         << "CexCacheTime INTEGER,"
-         << "ForkTime INTEGER,"
-         << "ResolveTime INTEGER,"
-         << "QueryCacheMisses INTEGER,"
-         << "QueryCacheHits INTEGER,"
-         << "QueryCexCacheMisses INTEGER,"
-         << "QueryCexCacheHits INTEGER,"
-         << "InhibitedForks INTEGER,"
-         << "ExternalCalls INTEGER,"
-         << "Allocations INTEGER,"
-         << "States INTEGER,"
-         BRANCH_TYPES
-         TERMINATION_CLASSES
-         << "ArrayHashTime INTEGER"
-         << ')';
+  std::ostringstream create, insert, values;
+  create << "CREATE TABLE stats (";
+  insert << "INSERT OR FAIL INTO stats (";
+  values << " VALUES (";
+  const char *sep = "";
+  for (const auto &column : statsRow()) {
+    bool isTime = !std::strcmp(column.first, "UserTime") ||
+                  !std::strcmp(column.first, "WallTime");
+    create << sep << column.first << (isTime ? " REAL" : " INTEGER");
+    insert << sep << column.first;
+    values << sep << '?';
+    sep = ",";
+  }
+  create << ')';
+  values << ')';
   char *zErrMsg = nullptr;
   if(sqlite3_exec(statsFile, create.str().c_str(), nullptr, nullptr, &zErrMsg)) {
     klee_error("%s", sqlite3ErrToStringAndFree("ERROR creating table: ", zErrMsg).c_str());
@@ -482,76 +516,7 @@ void StatsTracker::writeStatsHeader() {
    * happen, but if it does this statement will fail with SQLITE_CONSTRAINT error. If this happens you should either
    * remove the constraints or consider using `IGNORE` mode.
    */
-  #undef BTYPE
-  #define BTYPE(Name, I) << "Branches" #Name ","
-  #undef TCLASS
-  #define TCLASS(Name, I) << "Termination" #Name ","
-  insert << "INSERT OR FAIL INTO stats ("
-         << "Instructions,"
-         << "FullBranches,"
-         << "PartialBranches,"
-         << "NumBranches,"
-         << "UserTime,"
-         << "NumStates,"
-         << "MallocUsage,"
-         << "Queries,"
-         << "SolverQueries,"
-         << "NumQueryConstructs,"
-         << "WallTime,"
-         << "CoveredInstructions,"
-         << "UncoveredInstructions,"
-         << "QueryTime,"
-         << "SolverTime,"
-         << "CexCacheTime,"
-         << "ForkTime,"
-         << "ResolveTime,"
-         << "QueryCacheMisses,"
-         << "QueryCacheHits,"
-         << "QueryCexCacheMisses,"
-         << "QueryCexCacheHits,"
-         << "InhibitedForks,"
-         << "ExternalCalls,"
-         << "Allocations,"
-         << "States,"
-         BRANCH_TYPES
-         TERMINATION_CLASSES
-         << "ArrayHashTime"
-         << ')';
-  #undef BTYPE
-  #define BTYPE(Name, I) << "?,"
-  #undef TCLASS
-  #define TCLASS(Name, I) << "?,"
-  insert << " VALUES ("
-         << "?,"
-         << "?,"
-         << "?,"
-         << "?,"
-         << "?,"
-         << "?,"
-         << "?,"
-         << "?,"
-         << "?,"
-         << "?,"
-         << "?,"
-         << "?,"
-         << "?,"
-         << "?,"
-         << "?,"
-         << "?,"
-         << "?,"
-         << "?,"
-         << "?,"
-         << "?,"
-         << "?,"
-         << "?,"
-         << "?,"
-         << "?,"
-         << "?,"
-         << "?,"
-         BRANCH_TYPES
-         TERMINATION_CLASSES
-         << "? "
-         << ')';
+  insert << ')' << values.str();
 
   if(sqlite3_prepare_v2(statsFile, insert.str().c_str(), -1, &insertStmt, nullptr) != SQLITE_OK) {
     klee_error("Cannot create prepared statement: %s", sqlite3_errmsg(statsFile));
@@ -562,45 +527,86 @@ time::Span StatsTracker::elapsed() {
   return time::getWallTime() - startWallTime;
 }
 
-void StatsTracker::writeStatsLine() {
+std::vector<std::pair<const char *, std::int64_t>> StatsTracker::statsRow() {
   #undef BTYPE
-  #define BTYPE(Name,I) sqlite3_bind_int64(insertStmt, arg++, stats::branches ## Name);
+  #define BTYPE(Name,I) row.emplace_back("Branches" #Name, stats::branches ## Name);
   #undef TCLASS
-  #define TCLASS(Name,I) sqlite3_bind_int64(insertStmt, arg++, stats::termination ## Name);
-  int arg = 1;
-  sqlite3_bind_int64(insertStmt, arg++, stats::instructions);
-  sqlite3_bind_int64(insertStmt, arg++, fullBranches);
-  sqlite3_bind_int64(insertStmt, arg++, partialBranches);
-  sqlite3_bind_int64(insertStmt, arg++, numBranches);
-  sqlite3_bind_int64(insertStmt, arg++, time::getUserTime().toMicroseconds());
-  sqlite3_bind_int64(insertStmt, arg++, executor.states.size());
-  sqlite3_bind_int64(insertStmt, arg++, util::GetTotalMallocUsage() + executor.memory->getUsedDeterministicSize());
-  sqlite3_bind_int64(insertStmt, arg++, stats::queries);
-  sqlite3_bind_int64(insertStmt, arg++, stats::solverQueries);
-  sqlite3_bind_int64(insertStmt, arg++, stats::queryConstructs);
-  sqlite3_bind_int64(insertStmt, arg++, elapsed().toMicroseconds());
-  sqlite3_bind_int64(insertStmt, arg++, stats::coveredInstructions);
-  sqlite3_bind_int64(insertStmt, arg++, stats::uncoveredInstructions);
-  sqlite3_bind_int64(insertStmt, arg++, stats::queryTime);
-  sqlite3_bind_int64(insertStmt, arg++, stats::solverTime);
-  sqlite3_bind_int64(insertStmt, arg++, stats::cexCacheTime);
-  sqlite3_bind_int64(insertStmt, arg++, stats::forkTime);
-  sqlite3_bind_int64(insertStmt, arg++, stats::resolveTime);
-  sqlite3_bind_int64(insertStmt, arg++, stats::queryCacheMisses);
-  sqlite3_bind_int64(insertStmt, arg++, stats::queryCacheHits);
-  sqlite3_bind_int64(insertStmt, arg++, stats::queryCexCacheMisses);
-  sqlite3_bind_int64(insertStmt, arg++, stats::queryCexCacheHits);
-  sqlite3_bind_int64(insertStmt, arg++, stats::inhibitedForks);
-  sqlite3_bind_int64(insertStmt, arg++, stats::externalCalls);
-  sqlite3_bind_int64(insertStmt, arg++, stats::allocations);
-  sqlite3_bind_int64(insertStmt, arg++, ExecutionState::getLastID());
+  #define TCLASS(Name,I) row.emplace_back("Termination" #Name, stats::termination ## Name);
+  std::vector<std::pair<const char *, std::int64_t>> row;
+  row.emplace_back("Instructions", stats::instructions);
+  row.emplace_back("FullBranches", fullBranches);
+  row.emplace_back("PartialBranches", partialBranches);
+  row.emplace_back("NumBranches", numBranches);
+  row.emplace_back("UserTime", time::getUserTime().toMicroseconds());
+  row.emplace_back("NumStates", executor.states.size());
+  row.emplace_back("MallocUsage", util::GetTotalMallocUsage() + executor.memory->getUsedDeterministicSize());
+  row.emplace_back("Queries", stats::queries);
+  row.emplace_back("SolverQueries", stats::solverQueries);
+  row.emplace_back("NumQueryConstructs", stats::queryConstructs);
+  row.emplace_back("WallTime", elapsed().toMicroseconds());
+  row.emplace_back("CoveredInstructions", stats::coveredInstructions);
+  row.emplace_back("UncoveredInstructions", stats::uncoveredInstructions);
+  row.emplace_back("QueryTime", stats::queryTime);
+  row.emplace_back("SolverTime", stats::solverTime);
+  row.emplace_back("CexCacheTime", stats::cexCacheTime);
+  row.emplace_back("ForkTime", stats::forkTime);
+  row.emplace_back("ResolveTime", stats::resolveTime);
+  row.emplace_back("QueryCacheMisses", stats::queryCacheMisses);
+  row.emplace_back("QueryCacheHits", stats::queryCacheHits);
+  row.emplace_back("QueryCexCacheMisses", stats::queryCexCacheMisses);
+  row.emplace_back("QueryCexCacheHits", stats::queryCexCacheHits);
+  row.emplace_back("QueryPersistentCacheMisses",
+                   stats::queryPersistentCacheMisses);
+  row.emplace_back("QueryPersistentCacheHits", stats::queryPersistentCacheHits);
+  row.emplace_back("InhibitedForks", stats::inhibitedForks);
+  row.emplace_back("ExternalCalls", stats::externalCalls);
+  row.emplace_back("Allocations", stats::allocations);
+  row.emplace_back("States", ExecutionState::getLastID());
+  const auto *tree = llvm::dyn_cast_or_null<PersistentExecutionTree>(
+      executor.executionTree.get());
+  row.emplace_back("ExecTreeQueueDepth",
+                   tree ? tree->getWriter().getQueueDepth() : 0);
+  row.emplace_back("ExecTreeWriteTime",
+                   tree ? tree->getWriter().getWriteTime().toMicroseconds() : 0);
+  row.emplace_back("ExecTreeStallTime",
+                   tree ? tree->getWriter().getStallTime().toMicroseconds() : 0);
+  row.emplace_back("TestQueueDepth",
+                   executor.interpreterHandler->getTestQueueDepth());
+  row.emplace_back("TestWriteTime",
+                   executor.interpreterHandler->getTestWriteTime());
   BRANCH_TYPES
   TERMINATION_CLASSES
 #ifdef KLEE_ARRAY_DEBUG
-  sqlite3_bind_int64(insertStmt, arg++, stats::arrayHashTime);
+  row.emplace_back("ArrayHashTime", stats::arrayHashTime);
 #else
-  sqlite3_bind_int64(insertStmt, arg++, -1LL);
+  row.emplace_back("ArrayHashTime", -1LL);
 #endif
+  return row;
+}
+
+void StatsTracker::writeStatsLine() {
+  const auto row = statsRow();
+
+  if (statsPublisher) {
+    std::string json = "{";
+    for (const auto &column : row) {
+      if (json.size() > 1)
+        json += ',';
+      json += '"';
+      json += column.first;
+      json += "\":";
+      json += std::to_string(column.second);
+    }
+    json += "}\n";
+    statsPublisher->publish(json);
+  }
+
+  if (!statsFile)
+    return;
+
+  int arg = 1;
+  for (const auto &column : row)
+    sqlite3_bind_int64(insertStmt, arg++, column.second);
   int errCode = sqlite3_step(insertStmt);
   if(errCode != SQLITE_DONE) klee_error("Error writing stats data: %s", sqlite3_errmsg(statsFile));
   sqlite3_reset(insertStmt);
@@ -769,6 +775,9 @@ void StatsTracker::writeIStats() {
     }
   }
 
+  if (OutputCallPathProfile)
+    writeCallPathProfile();
+
   if (istatsMask.test(stats::states.getID()))
     updateStateStatistics((uint64_t)-1);
   
@@ -780,6 +789,42 @@ void StatsTracker::writeIStats() {
   of.flush();
 }
 
+/// Write the statistics of every call path (excluding callees) to
+/// run.callpaths, one path per line after its caller:
+///   <id> <caller id> <calls> <instructions> <forks> <solver time> <states> <function>
+/// Recursive calls are attributed to the existing path of the callee.
+void StatsTracker::writeCallPathProfile() {
+  const auto path = executor.interpreterHandler->getOutputFilename("run.callpaths");
+  const auto tmpPath = path + ".tmp";
+  std::string error;
+  auto of = klee_open_output_file(tmpPath, error);
+  if (!of) {
+    klee_warning("Unable to write call path profile: %s", error.c_str());
+    return;
+  }
+
+  *of << "version: 1\n";
+  *of << "cmd: " << executor.kmodule->module->getModuleIdentifier() << "\n";
+  *of << "events: Calls Instructions Forks SolverTime(us) States\n";
+
+  std::unordered_map<const CallPathNode *, std::size_t> ids;
+  for (const auto &cp : callPathManager.getCallPaths()) {
+    const std::size_t id = ids.size() + 1;
+    ids[cp.get()] = id;
+    auto parent = ids.find(cp->parent);
+    const StatisticRecord &sr = cp->statistics;
+    *of << id << ' ' << (parent == ids.end() ? 0 : parent->second) << ' '
+        << cp->count << ' ' << sr.getValue(stats::instructions) << ' '
+        << sr.getValue(stats::forks) << ' ' << sr.getValue(stats::solverTime)
+        << ' ' << sr.getValue(stats::states) << ' '
+        << cp->function->getName() << '\n';
+  }
+  of.reset();
+
+  if (auto ec = sys::fs::rename(tmpPath, path))
+    klee_warning("Unable to write call path profile: %s", ec.message().c_str());
+}
+
 ///
 
 typedef std::map<Instruction*, std::vector<Function*> > calltargets_ty;
@@ -802,6 +847,24 @@ static std::vector<Instruction*> getSuccs(Instruction *i) {
   return res;
 }
 
+/// Distance from i to its successors: 1 plus the length of the shortest path
+/// through the callees for calls, 0 if no callee returns
+static unsigned getDistanceThrough(Instruction *i) {
+  if (!isa<CallInst>(i) && !isa<InvokeInst>(i))
+    return 1;
+
+  unsigned bestThrough = 0;
+  for (Function *target : callTargets[i]) {
+    uint64_t dist = functionShortestPath[target];
+    if (dist) {
+      dist = 1+dist; // count instruction itself
+      if (bestThrough==0 || dist<bestThrough)
+        bestThrough = dist;
+    }
+  }
+  return bestThrough;
+}
+
 uint64_t klee::computeMinDistToUncovered(const KInstruction *ki,
                                          uint64_t minDistAtRA) {
   StatisticManager &sm = *theStatisticManager;
@@ -824,7 +887,7 @@ uint64_t klee::computeMinDistToUncovered(const KInstruction *ki,
   }
 }
 
-void StatsTracker::computeReachableUncovered() {
+void StatsTracker::computeReachableUncoveredFully() {
   KModule *km = executor.kmodule.get();
   const auto m = km->module.get();
   static bool init = true;
@@ -979,6 +1042,12 @@ void StatsTracker::computeReachableUncovered() {
                            sm.getIndexedValue(stats::uncoveredInstructions, id));
       }
     }
+    // the distance of a function is the one of its entry point
+    if (!fnIt->isDeclaration())
+      sm.setIndexedValue(
+          stats::minDistToUncovered, infos.getFunctionInfo(*fnIt).id,
+          sm.getIndexedValue(stats::minDistToUncovered,
+                             infos.getInfo(fnIt->front().front()).id));
   }
   
   std::reverse(instructions.begin(), instructions.end());
@@ -992,19 +1061,11 @@ void StatsTracker::computeReachableUncovered() {
       Instruction *inst = *it;
       uint64_t best, cur = best = sm.getIndexedValue(stats::minDistToUncovered,
                                                      infos.getInfo(*inst).id);
-      unsigned bestThrough = 0;
       
       if (isa<CallInst>(inst) || isa<InvokeInst>(inst)) {
         std::vector<Function*> &targets = callTargets[inst];
         for (std::vector<Function*>::iterator fnIt = targets.begin(),
                ie = targets.end(); fnIt != ie; ++fnIt) {
-          uint64_t dist = functionShortestPath[*fnIt];
-          if (dist) {
-            dist = 1+dist; // count instruction itself
-            if (bestThrough==0 || dist<bestThrough)
-              bestThrough = dist;
-          }
-
           if (!(*fnIt)->isDeclaration()) {
             uint64_t calleeDist = sm.getIndexedValue(
                 stats::minDistToUncovered, infos.getFunctionInfo(*(*fnIt)).id);
@@ -1015,11 +1076,9 @@ void StatsTracker::computeReachableUncovered() {
             }
           }
         }
-      } else {
-        bestThrough = 1;
       }
       
-      if (bestThrough) {
+      if (unsigned bestThrough = getDistanceThrough(inst)) {
         std::vector<Instruction*> succs = getSuccs(inst);
         for (std::vector<Instruction*>::iterator it2 = succs.begin(),
                ie = succs.end(); it2 != ie; ++it2) {
@@ -1037,9 +1096,216 @@ void StatsTracker::computeReachableUncovered() {
         sm.setIndexedValue(stats::minDistToUncovered, infos.getInfo(*inst).id,
                            best);
         changed = true;
+
+        Function *f = inst->getParent()->getParent();
+        if (inst == &*(f->begin()->begin()))
+          sm.setIndexedValue(stats::minDistToUncovered,
+                             infos.getFunctionInfo(*f).id, best);
       }
     }
   } while (changed);
+}
+
+void StatsTracker::buildUncoveredGraph() {
+  KModule *km = executor.kmodule.get();
+  const InstructionInfoTable &infos = *km->infos;
+  StatisticManager &sm = *theStatisticManager;
+
+  uncoveredGraph = std::make_unique<UncoveredGraph>();
+  UncoveredGraph &graph = *uncoveredGraph;
+  graph.succs.resize(infos.getMaxID());
+  graph.preds.resize(infos.getMaxID());
+  graph.sources.resize(infos.getMaxID());
+
+  auto addEdge = [&graph](unsigned from, unsigned to, uint64_t weight) {
+    graph.succs[from].emplace_back(to, weight);
+    graph.preds[to].emplace_back(from, weight);
+  };
+
+  // the same edges computeReachableUncoveredFully() relaxes
+  for (Function &f : *km->module) {
+    if (f.isDeclaration())
+      continue;
+    graph.entryFunctions[infos.getInfo(f.front().front()).id] =
+        infos.getFunctionInfo(f).id;
+
+    for (BasicBlock &bb : f) {
+      for (Instruction &inst : bb) {
+        unsigned id = infos.getInfo(inst).id;
+        graph.sources[id] = sm.getIndexedValue(stats::uncoveredInstructions, id);
+
+        if (isa<CallInst>(inst) || isa<InvokeInst>(inst)) {
+          for (Function *target : callTargets[&inst])
+            if (!target->isDeclaration())
+              addEdge(id, infos.getInfo(target->front().front()).id, 1);
+        }
+        if (unsigned bestThrough = getDistanceThrough(&inst))
+          for (Instruction *succ : getSuccs(&inst))
+            addEdge(id, infos.getInfo(*succ).id, bestThrough);
+      }
+    }
+  }
+}
+
+bool StatsTracker::updateReachableUncovered() {
+  StatisticManager &sm = *theStatisticManager;
+  UncoveredGraph &graph = *uncoveredGraph;
+
+  auto getDist = [&sm](unsigned id) {
+    return sm.getIndexedValue(stats::minDistToUncovered, id);
+  };
+  auto setDist = [&sm, &graph](unsigned id, uint64_t dist) {
+    sm.setIndexedValue(stats::minDistToUncovered, id, dist);
+    auto it = graph.entryFunctions.find(id);
+    if (it != graph.entryFunctions.end())
+      sm.setIndexedValue(stats::minDistToUncovered, it->second, dist);
+  };
+
+  typedef std::pair<uint64_t, unsigned> entry_ty;
+  std::priority_queue<entry_ty, std::vector<entry_ty>, std::greater<entry_ty>>
+      queue;
+
+  // Collect the instructions whose uncovered count changed. Covering an
+  // instruction removes it as a target, which can only increase distances.
+  std::vector<unsigned> improved;
+  for (unsigned id : newlyCovered) {
+    uint64_t source = sm.getIndexedValue(stats::uncoveredInstructions, id);
+    uint64_t old = graph.sources[id];
+    if (source == old)
+      continue;
+    graph.sources[id] = source;
+    if (old && (!source || source > old)) {
+      if (uint64_t dist = getDist(id))
+        queue.emplace(dist, id);
+    } else {
+      improved.push_back(id);
+    }
+  }
+  if (queue.empty() && improved.empty())
+    return false;
+
+  // Find the instructions whose distance relied on a removed target: in order
+  // of their distance, an instruction is affected unless its own uncovered
+  // count or an edge to an unaffected instruction still yields its distance.
+  std::unordered_set<unsigned> affected;
+  while (!queue.empty()) {
+    auto [dist, id] = queue.top();
+    queue.pop();
+    if (affected.count(id))
+      continue;
+
+    bool supported = graph.sources[id] == dist;
+    for (auto &[succ, weight] : graph.succs[id]) {
+      if (supported)
+        break;
+      uint64_t succDist = getDist(succ);
+      supported =
+          succDist && weight + succDist == dist && !affected.count(succ);
+    }
+    if (supported)
+      continue;
+
+    affected.insert(id);
+    for (auto &[pred, weight] : graph.preds[id]) {
+      uint64_t predDist = getDist(pred);
+      if (predDist == weight + dist && !affected.count(pred))
+        queue.emplace(predDist, pred);
+    }
+  }
+
+  // Recompute the affected distances from the unaffected ones (Dijkstra)
+  std::vector<entry_ty> seeds;
+  for (unsigned id : affected) {
+    uint64_t best = graph.sources[id];
+    for (auto &[succ, weight] : graph.succs[id]) {
+      if (affected.count(succ))
+        continue;
+      if (uint64_t succDist = getDist(succ))
+        if (best == 0 || weight + succDist < best)
+          best = weight + succDist;
+    }
+    if (best)
+      seeds.emplace_back(best, id);
+  }
+  for (unsigned id : affected)
+    setDist(id, 0);
+  for (auto &seed : seeds)
+    queue.push(seed);
+  while (!queue.empty()) {
+    auto [dist, id] = queue.top();
+    queue.pop();
+    if (getDist(id))
+      continue; // already settled
+    setDist(id, dist);
+    for (auto &[pred, weight] : graph.preds[id])
+      if (affected.count(pred) && !getDist(pred))
+        queue.emplace(weight + dist, pred);
+  }
+
+  // Propagate new or closer targets backwards, also from the recomputed
+  // instructions as they may have reached such a target
+  for (unsigned id : improved) {
+    uint64_t source = graph.sources[id], dist = getDist(id);
+    if (source && (!dist || source < dist))
+      setDist(id, source);
+  }
+  if (!improved.empty()) {
+    for (unsigned id : improved)
+      if (uint64_t dist = getDist(id))
+        queue.emplace(dist, id);
+    for (unsigned id : affected)
+      if (uint64_t dist = getDist(id))
+        queue.emplace(dist, id);
+  }
+  while (!queue.empty()) {
+    auto [dist, id] = queue.top();
+    queue.pop();
+    if (getDist(id) != dist)
+      continue; // outdated
+    for (auto &[pred, weight] : graph.preds[id]) {
+      uint64_t predDist = getDist(pred);
+      if (!predDist || weight + dist < predDist) {
+        setDist(pred, weight + dist);
+        queue.emplace(weight + dist, pred);
+      }
+    }
+  }
+
+  return true;
+}
+
+void StatsTracker::validateReachableUncovered() {
+  StatisticManager &sm = *theStatisticManager;
+  unsigned numIds = executor.kmodule->infos->getMaxID();
+
+  std::vector<uint64_t> incremental(numIds);
+  for (unsigned id = 0; id != numIds; ++id)
+    incremental[id] = sm.getIndexedValue(stats::minDistToUncovered, id);
+
+  computeReachableUncoveredFully();
+
+  for (unsigned id = 0; id != numIds; ++id) {
+    uint64_t full = sm.getIndexedValue(stats::minDistToUncovered, id);
+    if (incremental[id] != full)
+      klee_error("Incremental distance to uncovered instructions of id %u is "
+                 "%" PRIu64 " instead of %" PRIu64,
+                 id, incremental[id], full);
+  }
+}
+
+void StatsTracker::computeReachableUncovered() {
+  bool changed = true;
+  if (!uncoveredGraph) {
+    computeReachableUncoveredFully();
+    buildUncoveredGraph();
+  } else {
+    changed = updateReachableUncovered();
+    if (DebugValidateReachableUncovered)
+      validateReachableUncovered();
+  }
+  newlyCovered.clear();
+  if (!changed)
+    return;
 
   for (std::set<ExecutionState*>::iterator it = executor.states.begin(),
          ie = executor.states.end(); it != ie; ++it) {
@@ -11,11 +11,16 @@
 #define KLEE_STATSTRACKER_H
 
 #include "CallPathManager.h"
+#include "StatsPublisher.h"
 #include "klee/System/Time.h"
 
+#include <cstdint>
 #include <memory>
 #include <set>
 #include <sqlite3.h>
+#include <unordered_map>
+#include <utility>
+#include <vector>
 
 namespace llvm {
   class BranchInst;
@@ -46,6 +51,7 @@ namespace klee {
     ::sqlite3_stmt *insertStmt = nullptr;
     std::uint32_t statsCommitEvery;
     std::uint32_t statsWriteCount = 0;
+    std::unique_ptr<StatsPublisher> statsPublisher;
     time::Point startWallTime;
 
     unsigned numBranches;
@@ -55,15 +61,39 @@ namespace klee {
 
     bool updateMinDistToUncovered;
 
+    /// Instruction graph of the distances to uncovered instructions, indexed
+    /// by instruction id. The distance of an instruction is the minimum of its
+    /// uncovered count and, over its edges, the edge weight plus the distance
+    /// of the target (0 is unreachable).
+    struct UncoveredGraph {
+      typedef std::vector<std::pair<unsigned, std::uint64_t>> edges_ty;
+      std::vector<edges_ty> succs;
+      std::vector<edges_ty> preds;
+      /// function ids by the ids of their entry instructions
+      std::unordered_map<unsigned, unsigned> entryFunctions;
+      /// uncovered counts the current distances are based on
+      std::vector<std::uint64_t> sources;
+    };
+    std::unique_ptr<UncoveredGraph> uncoveredGraph;
+    /// instructions covered since the last computeReachableUncovered()
+    std::vector<unsigned> newlyCovered;
+
   public:
     static bool useStatistics();
     static bool useIStats();
 
   private:
     void updateStateStatistics(uint64_t addend);
+    /// Current values of all columns of the stats table
+    std::vector<std::pair<const char *, std::int64_t>> statsRow();
     void writeStatsHeader();
     void writeStatsLine();
     void writeIStats();
+    void writeCallPathProfile();
+    void computeReachableUncoveredFully();
+    void buildUncoveredGraph();
+    bool updateReachableUncovered();
+    void validateReachableUncovered();
 
   public:
     StatsTracker(Executor &_executor, std::string _objectFilename,
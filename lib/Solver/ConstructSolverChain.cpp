@@ -18,6 +18,7 @@
 
 #include "llvm/Support/raw_ostream.h"
 
+#include <cstdint>
 #include <memory>
 #include <utility>
 
@@ -46,6 +47,12 @@ std::unique_ptr<Solver> constructSolverChain(
                  baseSolverQuerySMT2LogPath.c_str());
   }
 
+  if (!PersistentQueryCache.empty()) {
+    solver = createPersistentCachingSolver(
+        std::move(solver), PersistentQueryCache,
+        static_cast<std::uint64_t>(PersistentQueryCacheSize) << 20);
+  }
+
   if (UseAssignmentValidatingSolver)
     solver = createAssignmentValidatingSolver(std::move(solver));
 
@@ -0,0 +1,450 @@
+//===-- PersistentCachingSolver.cpp - On-disk query cache -----------------===//
+//
+//                     The KLEE Symbolic Virtual Machine
+//
+// This file is distributed under the University of Illinois Open Source
+// License. See LICENSE.TXT for details.
+//
+//===----------------------------------------------------------------------===//
+
+#include "klee/Solver/Solver.h"
+
+#include "klee/Expr/Constraints.h"
+#include "klee/Expr/Expr.h"
+#include "klee/Expr/ExprPPrinter.h"
+#include "klee/Solver/SolverImpl.h"
+#include "klee/Solver/SolverStats.h"
+#include "klee/Support/ErrorHandling.h"
+
+#include "llvm/Support/raw_ostream.h"
+#include "llvm/Support/xxhash.h"
+
+#include <sqlite3.h>
+
+#include <algorithm>
+#include <chrono>
+#include <cstdint>
+#include <memory>
+#include <string>
+#include <unordered_map>
+#include <utility>
+#include <vector>
+
+using namespace klee;
+
+namespace {
+
+/// Number of results buffered in memory before they are written to the
+/// database in one transaction
+constexpr std::size_t FlushThreshold = 64;
+
+/// Milliseconds to wait for other KLEE processes holding the database lock
+constexpr int BusyTimeout = 10000;
+
+/// The kind of a cached result (also the first line of its key)
+enum class EntryKind { Validity, Truth, InitialValues };
+
+struct CacheEntry {
+  std::string query;
+  /// Solver::Validity, isValid or hasSolution
+  int result{0};
+  /// concatenated values of the arrays (InitialValues with a solution)
+  std::vector<unsigned char> values;
+};
+
+class PersistentCachingSolver : public SolverImpl {
+private:
+  std::unique_ptr<Solver> solver;
+  std::string path;
+  std::uint64_t maxSize;
+
+  /// the database is opened on the first lookup
+  bool opened{false};
+  sqlite3 *db{nullptr};
+  sqlite3_stmt *lookupStmt{nullptr};
+  sqlite3_stmt *insertStmt{nullptr};
+  sqlite3_stmt *touchStmt{nullptr};
+
+  /// results not written to the database yet
+  std::unordered_map<std::uint64_t, CacheEntry> pending;
+  /// entries that were hit since the last flush (to update their LRU time)
+  std::vector<std::uint64_t> touched;
+  /// bytes inserted since the size of the database was last checked
+  std::uint64_t insertedSize{0};
+
+  bool open();
+  void close();
+  bool prepare(const char *sql, sqlite3_stmt **stmt);
+  bool exec(const char *sql);
+  void flush();
+  void evict();
+
+  static std::string key(EntryKind kind, const Query &query,
+                         const std::vector<const Array *> *objects = nullptr);
+  bool lookup(const std::string &key, CacheEntry &entry);
+  void insert(const std::string &key, CacheEntry entry);
+
+public:
+  PersistentCachingSolver(std::unique_ptr<Solver> solver, std::string path,
+                          std::uint64_t maxSize)
+      : solver(std::move(solver)), path(std::move(path)), maxSize(maxSize) {}
+  ~PersistentCachingSolver() override;
+
+  bool computeValidity(const Query &, Solver::Validity &result) override;
+  bool computeTruth(const Query &, bool &isValid) override;
+  bool computeValue(const Query &query, ref<Expr> &result) override {
+    return solver->impl->computeValue(query, result);
+  }
+  bool computeInitialValues(const Query &query,
+                            const std::vector<const Array *> &objects,
+                            std::vector<std::vector<unsigned char>> &values,
+                            bool &hasSolution) override;
+  SolverRunStatus getOperationStatusCode() override;
+  std::string getConstraintLog(const Query &) override;
+  void setCoreSolverTimeout(time::Span timeout) override;
+};
+
+std::int64_t now() {
+  return std::chrono::duration_cast<std::chrono::microseconds>(
+             std::chrono::system_clock::now().time_since_epoch())
+      .count();
+}
+
+} // namespace
+
+PersistentCachingSolver::~PersistentCachingSolver() { close(); }
+
+bool PersistentCachingSolver::prepare(const char *sql, sqlite3_stmt **stmt) {
+  if (sqlite3_prepare_v2(db, sql, -1, stmt, nullptr) == SQLITE_OK)
+    return true;
+  klee_warning("Persistent query cache: cannot prepare query: %s [%s]",
+               sqlite3_errmsg(db), sql);
+  return false;
+}
+
+bool PersistentCachingSolver::exec(const char *sql) {
+  char *errMsg = nullptr;
+  if (sqlite3_exec(db, sql, nullptr, nullptr, &errMsg) == SQLITE_OK)
+    return true;
+  klee_warning("Persistent query cache: %s [%s]", errMsg, sql);
+  sqlite3_free(errMsg);
+  return false;
+}
+
+bool PersistentCachingSolver::open() {
+  if (opened)
+    return db != nullptr;
+  opened = true;
+
+  if (sqlite3_open(path.c_str(), &db) != SQLITE_OK) {
+    klee_warning("Cannot open persistent query cache %s: %s", path.c_str(),
+                 sqlite3_errmsg(db));
+    sqlite3_close(db);
+    db = nullptr;
+    return false;
+  }
+  // other KLEE processes may use the database at the same time
+  sqlite3_busy_timeout(db, BusyTimeout);
+
+  // entries are keyed by the hash of the query, the query itself is stored to
+  // detect collisions
+  if (!exec("PRAGMA journal_mode = WAL;") ||
+      !exec("PRAGMA synchronous = NORMAL;") ||
+      !exec("CREATE TABLE IF NOT EXISTS queries ("
+            "hash INTEGER PRIMARY KEY, query TEXT NOT NULL, "
+            "result INTEGER NOT NULL, assignment BLOB, size INTEGER NOT NULL, "
+            "lastUsed INTEGER NOT NULL);") ||
+      !exec("CREATE INDEX IF NOT EXISTS queriesLastUsed ON queries(lastUsed);") ||
+      !prepare("SELECT query, result, assignment FROM queries WHERE hash = ?;",
+               &lookupStmt) ||
+      !prepare("INSERT OR REPLACE INTO queries VALUES (?, ?, ?, ?, ?, ?);",
+               &insertStmt) ||
+      !prepare("UPDATE queries SET lastUsed = ? WHERE hash = ?;",
+               &touchStmt)) {
+    klee_warning("Persistent query cache %s disabled", path.c_str());
+    close();
+    return false;
+  }
+  klee_message("Using persistent query cache %s", path.c_str());
+  return true;
+}
+
+void PersistentCachingSolver::close() {
+  if (!db)
+    return;
+  if (insertStmt && touchStmt) {
+    flush();
+    evict();
+  }
+  sqlite3_finalize(lookupStmt);
+  sqlite3_finalize(insertStmt);
+  sqlite3_finalize(touchStmt);
+  lookupStmt = insertStmt = touchStmt = nullptr;
+  if (sqlite3_close(db) != SQLITE_OK)
+    klee_warning("Cannot close persistent query cache %s: %s", path.c_str(),
+                 sqlite3_errmsg(db));
+  db = nullptr;
+}
+
+void PersistentCachingSolver::flush() {
+  if (pending.empty() && touched.empty())
+    return;
+
+  // the cache is best effort: results are dropped if the database stays
+  // locked by other processes
+  if (exec("BEGIN IMMEDIATE TRANSACTION;")) {
+    const std::int64_t lastUsed = now();
+    for (const auto &p : pending) {
+      const CacheEntry &entry = p.second;
+      std::int64_t size = entry.query.size() + entry.values.size();
+      sqlite3_bind_int64(insertStmt, 1, static_cast<std::int64_t>(p.first));
+      sqlite3_bind_text(insertStmt, 2, entry.query.data(), entry.query.size(),
+                        SQLITE_STATIC);
+      sqlite3_bind_int(insertStmt, 3, entry.result);
+      if (entry.values.empty())
+        sqlite3_bind_null(insertStmt, 4);
+      else
+        sqlite3_bind_blob(insertStmt, 4, entry.values.data(),
+                          entry.values.size(), SQLITE_STATIC);
+      sqlite3_bind_int64(insertStmt, 5, size);
+      sqlite3_bind_int64(insertStmt, 6, lastUsed);
+      if (sqlite3_step(insertStmt) != SQLITE_DONE)
+        klee_warning_once(0, "Persistent query cache: cannot insert: %s",
+                          sqlite3_errmsg(db));
+      sqlite3_reset(insertStmt);
+      insertedSize += size;
+    }
+    for (std::uint64_t hash : touched) {
+      sqlite3_bind_int64(touchStmt, 1, lastUsed);
+      sqlite3_bind_int64(touchStmt, 2, static_cast<std::int64_t>(hash));
+      sqlite3_step(touchStmt);
+      sqlite3_reset(touchStmt);
+    }
+    if (!exec("COMMIT TRANSACTION;"))
+      exec("ROLLBACK TRANSACTION;");
+  }
+  pending.clear();
+  touched.clear();
+
+  if (maxSize && insertedSize > maxSize / 16)
+    evict();
+}
+
+/// Remove the least recently used entries while the cache is larger than
+/// maxSize (down to 90% of it, so that eviction does not run on every flush)
+void PersistentCachingSolver::evict() {
+  insertedSize = 0;
+  if (!maxSize || !exec("BEGIN IMMEDIATE TRANSACTION;"))
+    return;
+
+  sqlite3_stmt *stmt = nullptr;
+  std::uint64_t total = 0;
+  if (prepare("SELECT TOTAL(size) FROM queries;", &stmt) &&
+      sqlite3_step(stmt) == SQLITE_ROW)
+    total = static_cast<std::uint64_t>(sqlite3_column_double(stmt, 0));
+  sqlite3_finalize(stmt);
+
+  if (total > maxSize) {
+    std::uint64_t excess = total - maxSize + maxSize / 10;
+    std::int64_t threshold = 0;
+    stmt = nullptr;
+    if (prepare("SELECT size, lastUsed FROM queries ORDER BY lastUsed;",
+                &stmt)) {
+      std::uint64_t freed = 0;
+      while (freed < excess && sqlite3_step(stmt) == SQLITE_ROW) {
+        freed += sqlite3_column_int64(stmt, 0);
+        threshold = sqlite3_column_int64(stmt, 1);
+      }
+    }
+    sqlite3_finalize(stmt);
+    stmt = nullptr;
+    if (prepare("DELETE FROM queries WHERE lastUsed <= ?;", &stmt)) {
+      sqlite3_bind_int64(stmt, 1, threshold);
+      sqlite3_step(stmt);
+    }
+    sqlite3_finalize(stmt);
+  }
+
+  if (!exec("COMMIT TRANSACTION;"))
+    exec("ROLLBACK TRANSACTION;");
+}
+
+/// @returns the canonical text of the query: its constraints are sorted, so
+/// that queries differing only in the order of their constraints share an
+/// entry
+std::string
+PersistentCachingSolver::key(EntryKind kind, const Query &query,
+                             const std::vector<const Array *> *objects) {
+  std::vector<ref<Expr>> sorted(query.constraints.begin(),
+                                query.constraints.end());
+  std::sort(sorted.begin(), sorted.end());
+  ConstraintSet constraints(std::move(sorted));
+
+  std::string text;
+  llvm::raw_string_ostream os(text);
+  switch (kind) {
+  case EntryKind::Validity:
+    os << "validity\n";
+    break;
+  case EntryKind::Truth:
+    os << "truth\n";
+    break;
+  case EntryKind::InitialValues:
+    os << "values\n";
+    break;
+  }
+  if (objects) {
+    const Array *const *begin = objects->data();
+    ExprPPrinter::printQuery(os, constraints, query.expr, nullptr, nullptr,
+                             begin, begin + objects->size());
+  } else {
+    ExprPPrinter::printQuery(os, constraints, query.expr);
+  }
+  os.flush();
+  return text;
+}
+
+/// @returns true on a cache hit, entry is only valid on a hit
+bool PersistentCachingSolver::lookup(const std::string &key,
+                                     CacheEntry &entry) {
+  if (!open())
+    return false;
+
+  std::uint64_t hash = llvm::xxHash64(key);
+  auto it = pending.find(hash);
+  if (it != pending.end()) {
+    if (it->second.query != key)
+      return false;
+    entry = it->second;
+    return true;
+  }
+
+  bool hit = false;
+  sqlite3_bind_int64(lookupStmt, 1, static_cast<std::int64_t>(hash));
+  if (sqlite3_step(lookupStmt) == SQLITE_ROW) {
+    const char *query =
+        reinterpret_cast<const char *>(sqlite3_column_text(lookupStmt, 0));
+    int queryLength = sqlite3_column_bytes(lookupStmt, 0);
+    if (query && key.compare(0, std::string::npos, query, queryLength) == 0) {
+      entry.result = sqlite3_column_int(lookupStmt, 1);
+      auto values =
+          static_cast<const unsigned char *>(sqlite3_column_blob(lookupStmt, 2));
+      entry.values.assign(values,
+                          values + sqlite3_column_bytes(lookupStmt, 2));
+      hit = true;
+    }
+  }
+  sqlite3_reset(lookupStmt);
+
+  if (hit) {
+    touched.push_back(hash);
+    if (touched.size() >= FlushThreshold)
+      flush();
+  }
+  return hit;
+}
+
+void PersistentCachingSolver::insert(const std::string &key,
+                                     CacheEntry entry) {
+  if (!db)
+    return;
+  entry.query = key;
+  pending[llvm::xxHash64(key)] = std::move(entry);
+  if (pending.size() >= FlushThreshold)
+    flush();
+}
+
+bool PersistentCachingSolver::computeValidity(const Query &query,
+                                              Solver::Validity &result) {
+  std::string k = key(EntryKind::Validity, query);
+  CacheEntry entry;
+  if (lookup(k, entry)) {
+    ++stats::queryPersistentCacheHits;
+    result = static_cast<Solver::Validity>(entry.result);
+    return true;
+  }
+
+  ++stats::queryPersistentCacheMisses;
+  if (!solver->impl->computeValidity(query, result))
+    return false;
+  entry.result = result;
+  insert(k, std::move(entry));
+  return true;
+}
+
+bool PersistentCachingSolver::computeTruth(const Query &query,
+                                           bool &isValid) {
+  std::string k = key(EntryKind::Truth, query);
+  CacheEntry entry;
+  if (lookup(k, entry)) {
+    ++stats::queryPersistentCacheHits;
+    isValid = entry.result;
+    return true;
+  }
+
+  ++stats::queryPersistentCacheMisses;
+  if (!solver->impl->computeTruth(query, isValid))
+    return false;
+  entry.result = isValid;
+  insert(k, std::move(entry));
+  return true;
+}
+
+bool PersistentCachingSolver::computeInitialValues(
+    const Query &query, const std::vector<const Array *> &objects,
+    std::vector<std::vector<unsigned char>> &values, bool &hasSolution) {
+  std::string k = key(EntryKind::InitialValues, query, &objects);
+  CacheEntry entry;
+  if (lookup(k, entry)) {
+    std::size_t size = 0;
+    for (const Array *array : objects)
+      size += array->size;
+    // a truncated entry is treated as a miss
+    if (!entry.result || entry.values.size() == size) {
+      ++stats::queryPersistentCacheHits;
+      hasSolution = entry.result;
+      values.clear();
+      if (hasSolution) {
+        auto it = entry.values.begin();
+        for (const Array *array : objects) {
+          values.emplace_back(it, it + array->size);
+          it += array->size;
+        }
+      }
+      return true;
+    }
+  }
+
+  ++stats::queryPersistentCacheMisses;
+  if (!solver->impl->computeInitialValues(query, objects, values, hasSolution))
+    return false;
+  entry = CacheEntry();
+  entry.result = hasSolution;
+  if (hasSolution)
+    for (const auto &value : values)
+      entry.values.insert(entry.values.end(), value.begin(), value.end());
+  insert(k, std::move(entry));
+  return true;
+}
+
+SolverImpl::SolverRunStatus
+PersistentCachingSolver::getOperationStatusCode() {
+  return solver->impl->getOperationStatusCode();
+}
+
+std::string PersistentCachingSolver::getConstraintLog(const Query &query) {
+  return solver->impl->getConstraintLog(query);
+}
+
+void PersistentCachingSolver::setCoreSolverTimeout(time::Span timeout) {
+  solver->impl->setCoreSolverTimeout(timeout);
+}
+
+///
+
+std::unique_ptr<Solver>
+klee::createPersistentCachingSolver(std::unique_ptr<Solver> solver,
+                                    std::string path, std::uint64_t maxSize) {
+  return std::make_unique<Solver>(std::make_unique<PersistentCachingSolver>(
+      std::move(solver), std::move(path), maxSize));
+}
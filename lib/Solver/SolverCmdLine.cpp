@@ -51,6 +51,20 @@ cl::opt<bool> UseBranchCache("use-branch-cache", cl::init(true),
                              cl::desc("Use the branch cache (default=true)"),
                              cl::cat(SolvingCat));
 
+cl::opt<std::string> PersistentQueryCache(
+    "persistent-query-cache", cl::init(""),
+    cl::desc("Cache the results of the queries reaching the solver in an "
+             "SQLite database at the given path, which is kept across runs and "
+             "can be shared by concurrent KLEE processes (default=off)"),
+    cl::cat(SolvingCat));
+
+cl::opt<unsigned> PersistentQueryCacheSize(
+    "persistent-query-cache-size", cl::init(1024),
+    cl::desc("Evict the least recently used entries of the persistent query "
+             "cache when it grows beyond the given size in MiB; 0 keeps all "
+             "entries (default=1024)"),
+    cl::cat(SolvingCat));
+
 cl::opt<bool>
     UseIndependentSolver("use-independent-solver", cl::init(true),
                          cl::desc("Use constraint independence (default=true)"),
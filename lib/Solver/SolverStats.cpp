@@ -20,6 +20,9 @@ Statistic stats::queryCacheHits("QueryCacheHits", "QChits") ;
 Statistic stats::queryCacheMisses("QueryCacheMisses", "QCmisses");
 Statistic stats::queryCexCacheHits("QueryCexCacheHits", "QCexHits") ;
 Statistic stats::queryCexCacheMisses("QueryCexCacheMisses", "QCexMisses");
+Statistic stats::queryPersistentCacheHits("QueryPersistentCacheHits", "QPChits");
+Statistic stats::queryPersistentCacheMisses("QueryPersistentCacheMisses",
+                                            "QPCmisses");
 Statistic stats::queryConstructs("QueryConstructs", "QB");
 Statistic stats::queryCounterexamples("QueriesCEX", "Qcex");
 Statistic stats::queryTime("QueryTime", "Qtime");
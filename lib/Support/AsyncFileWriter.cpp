@@ -0,0 +1,215 @@
+//===-- AsyncFileWriter.cpp -----------------------------------------------===//
+//
+//                     The KLEE Symbolic Virtual Machine
+//
+// This file is distributed under the University of Illinois Open Source
+// License. See LICENSE.TXT for details.
+//
+//===----------------------------------------------------------------------===//
+
+#include "klee/Support/AsyncFileWriter.h"
+
+#include "klee/Support/ErrorHandling.h"
+#include "klee/Support/FileHandling.h"
+#include "klee/Support/Timer.h"
+
+#include <cerrno>
+#include <cstring>
+#include <ctime>
+#include <iterator>
+
+using namespace klee;
+
+namespace {
+constexpr std::size_t TarBlockSize = 512;
+
+/// Write value as a NUL-terminated octal number into a field of size bytes
+void writeOctal(char *field, std::size_t size, std::uint64_t value) {
+  field[--size] = '\0';
+  while (size) {
+    field[--size] = '0' + (value & 7);
+    value >>= 3;
+  }
+}
+} // namespace
+
+AsyncFileWriter::AsyncFileWriter(std::string directory,
+                                 const std::string &archivePath,
+                                 std::size_t maxQueued)
+    : directory(std::move(directory)), maxQueued(maxQueued) {
+  if (!archivePath.empty()) {
+    archive = std::fopen(archivePath.c_str(), "wb");
+    if (!archive)
+      klee_error("cannot open \"%s\": %s", archivePath.c_str(),
+                 strerror(errno));
+  }
+  if (maxQueued)
+    thread = std::thread(&AsyncFileWriter::run, this);
+}
+
+AsyncFileWriter::~AsyncFileWriter() {
+  if (thread.joinable()) {
+    {
+      std::lock_guard<std::mutex> guard(lock);
+      stopping = true;
+    }
+    queueChanged.notify_all();
+    thread.join();
+  }
+  if (archive) {
+    // end of archive: two empty blocks
+    const char end[2 * TarBlockSize] = {};
+    if (std::fwrite(end, sizeof(end), 1, archive) != 1 ||
+        std::fclose(archive) != 0)
+      klee_warning("unable to finish test archive: %s", strerror(errno));
+  }
+  reportFailures();
+}
+
+void AsyncFileWriter::run() {
+  std::vector<std::pair<std::string, std::string>> batch;
+  for (;;) {
+    {
+      std::unique_lock<std::mutex> guard(lock);
+      queueChanged.wait(guard, [this] { return stopping || !queue.empty(); });
+      if (queue.empty())
+        return;
+      batch.assign(std::make_move_iterator(queue.begin()),
+                   std::make_move_iterator(queue.end()));
+      queue.clear();
+      writing = batch.size();
+      queueDepth = writing;
+    }
+    // the queue has space again
+    queueChanged.notify_all();
+
+    writeBatch(batch);
+
+    {
+      std::lock_guard<std::mutex> guard(lock);
+      writing = 0;
+      queueDepth = queue.size();
+    }
+    queueChanged.notify_all();
+  }
+}
+
+void AsyncFileWriter::writeBatch(
+    std::vector<std::pair<std::string, std::string>> &batch) {
+  WallTimer timer;
+  std::vector<std::string> lost;
+
+  if (archive) {
+    // one write for the whole batch
+    std::string buffer;
+    for (const auto &file : batch)
+      if (!appendToArchive(file.first, file.second, buffer))
+        lost.push_back(file.first);
+    if (std::fwrite(buffer.data(), 1, buffer.size(), archive) !=
+            buffer.size() ||
+        std::fflush(archive) != 0) {
+      for (const auto &file : batch)
+        lost.push_back(file.first);
+    }
+  } else {
+    for (const auto &file : batch)
+      if (!writeFile(file.first, file.second))
+        lost.push_back(file.first);
+  }
+  batch.clear();
+
+  writeTime += timer.delta().toMicroseconds();
+  if (!lost.empty()) {
+    std::lock_guard<std::mutex> guard(lock);
+    failed.insert(failed.end(), lost.begin(), lost.end());
+  }
+}
+
+bool AsyncFileWriter::writeFile(const std::string &name,
+                                const std::string &contents) {
+  std::string error;
+  auto f = klee_open_output_file(directory + "/" + name, error);
+  if (!f)
+    return false;
+  *f << contents;
+  f->close();
+  if (f->has_error()) {
+    f->clear_error();
+    return false;
+  }
+  return true;
+}
+
+bool AsyncFileWriter::appendToArchive(const std::string &name,
+                                      const std::string &contents,
+                                      std::string &buffer) {
+  char header[TarBlockSize] = {};
+  if (name.size() > 100)
+    return false;
+
+  // ustar header of a regular file
+  std::memcpy(header, name.data(), name.size());
+  writeOctal(header + 100, 8, 0644);
+  writeOctal(header + 108, 8, 0);
+  writeOctal(header + 116, 8, 0);
+  writeOctal(header + 124, 12, contents.size());
+  writeOctal(header + 136, 12, static_cast<std::uint64_t>(std::time(nullptr)));
+  header[156] = '0';
+  std::memcpy(header + 257, "ustar", 6);
+  std::memcpy(header + 263, "00", 2);
+
+  // the checksum is computed with the checksum field filled with spaces
+  std::memset(header + 148, ' ', 8);
+  unsigned checksum = 0;
+  for (unsigned char c : header)
+    checksum += c;
+  writeOctal(header + 148, 7, checksum);
+
+  buffer.append(header, sizeof(header));
+  buffer += contents;
+  buffer.append((TarBlockSize - contents.size() % TarBlockSize) % TarBlockSize,
+                '\0');
+  return true;
+}
+
+void AsyncFileWriter::reportFailures() {
+  std::vector<std::string> lost;
+  {
+    std::lock_guard<std::mutex> guard(lock);
+    lost.swap(failed);
+  }
+  for (const auto &name : lost)
+    klee_warning("unable to write \"%s\", losing it", name.c_str());
+}
+
+void AsyncFileWriter::write(std::string name, std::string contents) {
+  if (!thread.joinable()) {
+    std::vector<std::pair<std::string, std::string>> batch;
+    batch.emplace_back(std::move(name), std::move(contents));
+    writeBatch(batch);
+    reportFailures();
+    return;
+  }
+
+  {
+    std::unique_lock<std::mutex> guard(lock);
+    queueChanged.wait(guard, [this] { return queue.size() < maxQueued; });
+    queue.emplace_back(std::move(name), std::move(contents));
+    queueDepth = queue.size() + writing;
+  }
+  queueChanged.notify_all();
+  reportFailures();
+}
+
+void AsyncFileWriter::flush() {
+  if (thread.joinable()) {
+    std::unique_lock<std::mutex> guard(lock);
+    queueChanged.wait(guard,
+                      [this] { return queue.empty() && writing == 0; });
+  }
+  reportFailures();
+}
+
+time::Span AsyncFileWriter::getWriteTime() const {
+  return time::microseconds(writeTime);
+}
@@ -1,14 +1,37 @@
 #!/usr/bin/env python3
 
 import argparse
+import json
 import os
 import platform
 import subprocess
 import sys
 import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-def testFile(name, klee_path, lli_path):
-    print("CWD: \"{}\"".format(os.getcwd()))
+class TestError(Exception):
+    pass
+
+def isUpToDate(target, sources):
+    """Return True if target exists and is newer than all existing sources."""
+    if not os.path.exists(target):
+        return False
+    targetTime = os.path.getmtime(target)
+    return all(os.path.getmtime(s) <= targetTime
+               for s in sources if os.path.exists(s))
+
+def runTimed(cmd):
+    start = time.time()
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return proc, time.time() - start
+
+def testFile(name, klee_path, lli_path, src_path=None, out=sys.stdout):
+    """Build the bitcode of test _name_, run it with lli and klee in parallel
+    and compare their output. Returns the time taken by every step in
+    seconds."""
+    timings = {}
+    print("CWD: \"{}\"".format(os.getcwd()), file=out)
     baseName,ext = os.path.splitext(name)
     exeFile = 'Output/linked_%s.bc'%baseName
 
@@ -17,52 +40,107 @@ def testFile(name, klee_path, lli_path):
     else:
         make_prog = 'make'
 
-    print('-- building test bitcode --')
-    if os.path.exists("Makefile.cmake.test"):
-        # Prefer CMake generated make file
-        make_cmd = '%s -f Makefile.cmake.test %s 2>&1' % (make_prog, exeFile,)
+    print('-- building test bitcode --', file=out)
+    srcDir = os.path.dirname(os.path.abspath(src_path or __file__))
+    sources = [src_path or name, os.path.join(srcDir, '_testingUtils.c'),
+               'Makefile.cmake.test']
+    start = time.time()
+    if isUpToDate(exeFile, sources):
+        print('%s is up to date' % (exeFile,), file=out)
     else:
-        make_cmd = '%s %s 2>&1' % (make_prog, exeFile,)
-    print("EXECUTING: %s" % (make_cmd,))
-    sys.stdout.flush()
-    if os.system(make_cmd):
-        raise SystemExit('make failed')
+        if os.path.exists("Makefile.cmake.test"):
+            # Prefer CMake generated make file
+            make_cmd = [make_prog, '-f', 'Makefile.cmake.test', exeFile]
+        else:
+            make_cmd = [make_prog, exeFile]
+        print("EXECUTING: %s" % (make_cmd,), file=out)
+        out.flush()
+        make = subprocess.run(make_cmd, stdout=subprocess.PIPE,
+                              stderr=subprocess.STDOUT)
+        print(make.stdout.decode(), end='', file=out)
+        if make.returncode:
+            raise TestError('make failed')
+    timings['make'] = time.time() - start
 
-    print('\n-- running lli --')
     lli_cmd = [lli_path, '-force-interpreter=true', exeFile]
-    print("EXECUTING: %s" % (lli_cmd,))
-
-    lliOut = subprocess.check_output(lli_cmd).decode()
-    print('-- lli output --\n%s--\n' % (lliOut,))
-
-    print('-- running klee --')
     klee_out_path = "Output/%s.klee-out" % (baseName,)
     if os.path.exists(klee_out_path):
         shutil.rmtree(klee_out_path)
     klee_cmd = klee_path.split() + ['--output-dir=' + klee_out_path,  '--write-no-tests', exeFile]
-    print("EXECUTING: %s" % (klee_cmd,))
-    sys.stdout.flush()
-
-    kleeOut = subprocess.check_output(klee_cmd).decode()
-    print('-- klee output --\n%s--\n' % (kleeOut,))
-        
-    if lliOut != kleeOut:
-        raise SystemExit('outputs differ')
-        
-def testOneFile(f, printOutput=False):
+
+    print('\n-- running lli and klee --', file=out)
+    print("EXECUTING: %s" % (lli_cmd,), file=out)
+    print("EXECUTING: %s" % (klee_cmd,), file=out)
+    out.flush()
+    with ThreadPoolExecutor(2) as pool:
+        runs = [(tool, pool.submit(runTimed, cmd))
+                for tool, cmd in (('lli', lli_cmd), ('klee', klee_cmd))]
+    outputs = {}
+    for tool, run in runs:
+        proc, timings[tool] = run.result()
+        outputs[tool] = proc.stdout.decode()
+        print('-- %s output --\n%s--\n' % (tool, outputs[tool]), file=out)
+        if proc.stderr:
+            print('-- %s stderr --\n%s--\n' % (tool, proc.stderr.decode()),
+                  file=out)
+        if proc.returncode:
+            raise TestError('%s failed with exit code %d' % (tool, proc.returncode))
+
+    if outputs['lli'] != outputs['klee']:
+        raise TestError('outputs differ')
+    return timings
+
+def testOneFile(f, klee_path, lli_path, out=sys.stdout):
+    """Run test _f_ (a path to its source) and return its result code, a
+    message and the timings of the test."""
+    name = os.path.basename(f)
+    start = time.time()
+    timings = {}
     try:
-        testFile(f, printOutput)
-        code = ['pass','xpass'][f.startswith('broken')]
+        timings = testFile(name, klee_path, lli_path, f, out)
+        code = ['pass','xpass'][name.startswith('broken')]
         extra = ''
-    except TestError as e:
-        code = ['fail','xfail'][f.startswith('broken')]
+    except (TestError, subprocess.SubprocessError, OSError) as e:
+        code = ['fail','xfail'][name.startswith('broken')]
         extra = str(e)
+    timings['total'] = time.time() - start
+
+    print('%s: %s -- %s'%(code,f,extra), file=out)
+    return code, extra, timings
 
-    print('%s: %s -- %s'%(code,f,extra))
+def testAll(files, klee_path, lli_path, jobs, verbose=False):
+    """Run all tests in a pool of _jobs_ workers. Returns the results by
+    test."""
+    class Log(object):
+        def __init__(self):
+            self.lines = []
+        def write(self, s):
+            self.lines.append(s)
+        def flush(self):
+            pass
+
+    def run(f):
+        log = Log()
+        return f, log, testOneFile(f, klee_path, lli_path, log)
+
+    # make sure the shared output directory exists before running make
+    # concurrently
+    if not os.path.isdir('Output'):
+        os.makedirs('Output')
+    results = {}
+    with ThreadPoolExecutor(jobs) as pool:
+        for f, log, (code, extra, timings) in pool.map(run, files):
+            if verbose or code in ('fail', 'xpass'):
+                sys.stdout.write(''.join(log.lines))
+            else:
+                print('%s: %s -- %s' % (code, f, extra))
+            results[f] = dict(result=code, message=extra, **timings)
+    return results
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument('test_path', help='test path')
+    parser.add_argument('test_path', nargs='+',
+                        help='test path (several tests are run concurrently)')
 
     parser.add_argument('--klee', dest='klee_path',
                         help="path to the klee binary",
@@ -70,11 +148,34 @@ def main():
     parser.add_argument('--lli', dest='lli_path',
                         help="path to the lli binary",
                         required=True)
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                        help="number of tests to run at once "
+                             "(default: number of cores)")
+    parser.add_argument('--timings', metavar='FILE',
+                        help="write the result and the time taken by every "
+                             "step of each test to FILE in JSON format")
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help="print the output of passing tests as well")
 
     opts = parser.parse_args()
 
-    test_name = os.path.basename(opts.test_path)
-    testFile(test_name, opts.klee_path, opts.lli_path)
+    if len(opts.test_path) == 1 and opts.timings is None:
+        test_name = os.path.basename(opts.test_path[0])
+        try:
+            testFile(test_name, opts.klee_path, opts.lli_path, opts.test_path[0])
+        except TestError as e:
+            raise SystemExit(str(e))
+        return
+
+    results = testAll(opts.test_path, opts.klee_path, opts.lli_path,
+                      max(1, opts.jobs or 1), opts.verbose)
+    if opts.timings:
+        with open(opts.timings, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    failed = [f for f, r in results.items() if r['result'] in ('fail', 'xpass')]
+    print('%d of %d tests failed' % (len(failed), len(results)))
+    if failed:
+        sys.exit(1)
 
 if __name__=='__main__':
     main()
@@ -0,0 +1,41 @@
+// RUN: %clang %s -emit-llvm %O0opt -g -c -o %t.bc
+// RUN: rm -rf %t.klee-out
+// RUN: %klee --output-dir=%t.klee-out --search=nurs:md2u --timer-interval=1ms --uncovered-update-interval=1ms --debug-validate-reachable-uncovered %t.bc 2>&1 | FileCheck %s
+// RUN: rm -rf %t.klee-out
+// RUN: %klee --output-dir=%t.klee-out --search=nurs:covnew --timer-interval=1ms --uncovered-update-interval=1ms --debug-validate-reachable-uncovered %t.bc 2>&1 | FileCheck %s
+
+// Distances to uncovered instructions are updated incrementally while
+// coverage grows, and cross-checked against a full recomputation.
+
+// CHECK-NOT: Incremental distance to uncovered instructions
+// CHECK: KLEE: done: completed paths = 9
+// CHECK: KLEE: done: generated tests = 9
+
+#include "klee/klee.h"
+
+static int classify(int x) {
+  if (x < 0)
+    return -1;
+  if (x == 0)
+    return 0;
+  return 1;
+}
+
+static int count(int n) {
+  int sum = 0;
+  for (int i = 0; i < 4; ++i)
+    if (n & (1 << i))
+      sum += classify(n - i);
+  return sum;
+}
+
+int main(void) {
+  int a, b;
+  klee_make_symbolic(&a, sizeof(a), "a");
+  klee_make_symbolic(&b, sizeof(b), "b");
+
+  int r = classify(a) + classify(b);
+  if (r == 2)
+    return count(7);
+  return count(0);
+}
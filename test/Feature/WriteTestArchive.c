@@ -0,0 +1,44 @@
+// RUN: %clang %s -emit-llvm %O0opt -c -o %t.bc
+// RUN: rm -rf %t.klee-out
+// RUN: %klee --output-dir=%t.klee-out --write-test-archive --write-kqueries %t.bc 2>&1 | FileCheck --check-prefix=CHECK-KLEE %s
+// RUN: not ls %t.klee-out/test000001.ktest
+// RUN: tar -tf %t.klee-out/tests.tar | sort | FileCheck --check-prefix=CHECK-ARCHIVE %s
+// RUN: mkdir %t.klee-out/extracted
+// RUN: tar -xf %t.klee-out/tests.tar -C %t.klee-out/extracted
+// RUN: %ktest-tool %t.klee-out/extracted/test000001.ktest | FileCheck --check-prefix=CHECK-KTEST %s
+// RUN: %klee-stats --print-columns 'TestQueue' --table-format=csv %t.klee-out | FileCheck --check-prefix=CHECK-STATS %s
+
+// Without the background writer, the files are written while exploring
+// RUN: rm -rf %t.klee-out
+// RUN: %klee --output-dir=%t.klee-out --test-writer-queue=0 %t.bc
+// RUN: ls %t.klee-out | FileCheck --check-prefix=CHECK-FILES %s
+
+// CHECK-KLEE: KLEE: done: generated tests = 3
+
+// CHECK-ARCHIVE: test000001.kquery
+// CHECK-ARCHIVE-NEXT: test000001.ktest
+// CHECK-ARCHIVE-NEXT: test000002.kquery
+// CHECK-ARCHIVE-NEXT: test000002.ktest
+// CHECK-ARCHIVE-NEXT: test000003.kquery
+// CHECK-ARCHIVE-NEXT: test000003.ktest
+
+// CHECK-KTEST: object 0: name: {{b*}}'x'
+
+// CHECK-STATS: TestQueue
+// CHECK-STATS-NEXT: {{^[0-9]+$}}
+
+// CHECK-FILES: test000001.ktest
+// CHECK-FILES: test000002.ktest
+// CHECK-FILES: test000003.ktest
+
+#include "klee/klee.h"
+
+int main(void) {
+  int x;
+  klee_make_symbolic(&x, sizeof(x), "x");
+  if (x > 10)
+    return 1;
+  if (x < -10)
+    return 2;
+  return 0;
+}
@@ -0,0 +1,42 @@
+// RUN: rm -rf %t.dir %t.work
+// RUN: mkdir -p %t.dir
+// RUN: %ktest-gen --bout-file %t.dir/normal.ktest normal
+// RUN: %ktest-gen --bout-file %t.dir/exit.ktest exit
+// RUN: %ktest-gen --bout-file %t.dir/crash.ktest crash
+// RUN: %ktest-gen --bout-file %t.dir/loop.ktest loop
+// RUN: echo garbage > %t.dir/invalid.ktest
+// RUN: %cc %s -O0 -o %t
+// RUN: %klee-replay-batch -j 2 --timeout=1 --work-dir=%t.work -o %t.ndjson %t %t.dir 2> %t.log
+// RUN: FileCheck --input-file=%t.ndjson %s
+// RUN: FileCheck --input-file=%t.log -check-prefix=CHECK-SUMMARY %s
+
+// CHECK-DAG: "ktest": "{{.*}}normal.ktest", "args": ["-sym-arg", "6"], "objects": 1, "wall_time": {{[0-9.]+}}, "status": "normal", "test_exit_code": 0, "exit_code": 0}
+// CHECK-DAG: "ktest": "{{.*}}exit.ktest", {{.*}}"status": "abnormal", "test_exit_code": 3,
+// CHECK-DAG: "ktest": "{{.*}}crash.ktest", {{.*}}"status": "crashed", "signal": 6, "signal_name": "SIGABRT",{{.*}}"dir": "{{.*}}crash"
+// CHECK-DAG: "ktest": "{{.*}}loop.ktest", {{.*}}"status": "timeout",
+// CHECK-DAG: "ktest": "{{.*}}invalid.ktest", "status": "invalid",
+
+// CHECK-SUMMARY: klee-replay-batch: 5 tests: 1 abnormal, 1 crashed, 1 invalid, 1 normal, 1 timeout
+// CHECK-SUMMARY: klee-replay-batch: crashed with SIGABRT: 1
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+int main(int argc, char **argv) {
+  if (argc != 2)
+    return 1;
+
+  if (!strcmp(argv[1], "exit"))
+    return 3;
+
+  if (!strcmp(argv[1], "crash"))
+    abort();
+
+  if (!strcmp(argv[1], "loop"))
+    for (;;)
+      ;
+
+  printf("normal\n");
+  return 0;
+}
@@ -0,0 +1,49 @@
+// REQUIRES: uclibc
+// REQUIRES: posix-runtime
+// RUN: rm -rf %t.out %t.shards %t.corpus
+// RUN: mkdir -p %t.corpus
+// RUN: echo -n aaaa > %t.corpus/a.txt
+// RUN: echo -n bb > %t.corpus/b.txt
+// RUN: %clang %s -emit-llvm %O0opt -c -o %t.bc
+
+// Both seeds in one KLEE run
+// RUN: %klee-zesti --zesti-corpus=%t.corpus -output-dir=%t.out -only-replay-seeds -libc=uclibc -posix-runtime %t.bc -f @@ &> %t.log
+// RUN: FileCheck --input-file=%t.log -check-prefix=CHECK-SINGLE %s
+// CHECK-SINGLE-DAG: 2 seeds in 1 KLEE runs
+// CHECK-SINGLE-DAG: Got a
+// CHECK-SINGLE-DAG: Got b
+// CHECK-SINGLE-DAG: KLEE: done: completed paths = 2
+
+// One shard per seed
+// RUN: %klee-zesti --zesti-corpus=%t.corpus --zesti-shards=2 --zesti-jobs=2 -output-dir=%t.shards -only-replay-seeds -libc=uclibc -posix-runtime %t.bc -f @@ > %t.shards.log
+// RUN: FileCheck --input-file=%t.shards.log -check-prefix=CHECK-SHARDS %s
+// CHECK-SHARDS-DAG: 2 seeds in 2 KLEE runs, at most 2 at once
+// CHECK-SHARDS-DAG: shard 1/2 done (exit code 0)
+// CHECK-SHARDS-DAG: shard 2/2 done (exit code 0)
+// RUN: test -f %t.shards/shard-000/info
+// RUN: test -f %t.shards/shard-001/info
+// RUN: cat %t.shards/shard-000.log %t.shards/shard-001.log | FileCheck -check-prefix=CHECK-SHARD-LOGS %s
+// CHECK-SHARD-LOGS: KLEE: done: completed paths = 1
+// CHECK-SHARD-LOGS: KLEE: done: completed paths = 1
+
+#include <fcntl.h>
+#include <stdio.h>
+#include <string.h>
+#include <unistd.h>
+
+int main(int argc, char **argv) {
+  char c = 0;
+  int fd;
+
+  if (argc != 3 || strcmp(argv[1], "-f") != 0)
+    return 1;
+
+  if ((fd = open(argv[2], O_RDONLY)) < 0)
+    return 1;
+
+  if (read(fd, &c, 1) == 1)
+    printf("Got %c\n", c);
+
+  close(fd);
+  return 0;
+}
@@ -0,0 +1,54 @@
+// REQUIRES: uclibc
+// REQUIRES: posix-runtime
+// RUN: rm -rf %t.corpus %t.index
+// RUN: mkdir -p %t.corpus
+// RUN: echo -n aaaa > %t.corpus/1.txt
+// RUN: echo -n bbbb > %t.corpus/2.txt
+// RUN: echo -n abab > %t.corpus/3.txt
+// RUN: %clang %s -emit-llvm %O0opt -c -o %t.bc
+
+// RUN: %klee-zesti --zesti-corpus=%t.corpus --zesti-coverage-index=%t.index --zesti-select-only -libc=uclibc -posix-runtime %t.bc @@ > %t.list 2> %t.log
+// RUN: FileCheck --input-file=%t.log -check-prefix=CHECK-NEW %s
+// RUN: FileCheck --input-file=%t.list -check-prefix=CHECK-LIST %s
+// CHECK-NEW: replaying 3 new seeds
+// CHECK-NEW: selected 2 of 3 seeds
+
+// Only new seeds are replayed
+// RUN: echo -n cccc > %t.corpus/4.txt
+// RUN: %klee-zesti --zesti-corpus=%t.corpus --zesti-coverage-index=%t.index --zesti-select-only -libc=uclibc -posix-runtime %t.bc @@ > %t.list 2> %t.log
+// RUN: FileCheck --input-file=%t.log -check-prefix=CHECK-INCR %s
+// RUN: FileCheck --input-file=%t.list -check-prefix=CHECK-LIST %s
+// CHECK-INCR: replaying 1 new seeds
+// CHECK-INCR: selected 3 of 4 seeds
+// CHECK-LIST-NOT: 3.txt
+// CHECK-LIST-NOT: @@
+
+// The selected seeds are the same seeds when fed back with the same arguments
+// RUN: %klee-zesti --zesti-corpus=%t.list --zesti-coverage-index=%t.index --zesti-select-only -libc=uclibc -posix-runtime %t.bc @@ > %t.relist 2> %t.relog
+// RUN: FileCheck --input-file=%t.relog -check-prefix=CHECK-ROUNDTRIP %s
+// RUN: diff %t.list %t.relist
+// CHECK-ROUNDTRIP-NOT: replaying
+// CHECK-ROUNDTRIP: selected 3 of 3 seeds
+
+#include <fcntl.h>
+#include <stdio.h>
+#include <unistd.h>
+
+int main(int argc, char **argv) {
+  char c = 0;
+  int fd;
+
+  if (argc != 2 || (fd = open(argv[1], O_RDONLY)) < 0)
+    return 1;
+  read(fd, &c, 1);
+  close(fd);
+
+  if (c == 'a')
+    printf("a\n");
+  else if (c == 'b')
+    printf("b\n");
+  else
+    printf("other\n");
+
+  return 0;
+}
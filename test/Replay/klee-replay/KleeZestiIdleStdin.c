@@ -0,0 +1,19 @@
+// REQUIRES: uclibc
+// REQUIRES: posix-runtime
+// RUN: rm -rf %t.out
+// RUN: %clang %s -emit-llvm %O0opt -c -o %t.bc
+
+// A pipe on stdin that stays open without data is not waited for
+// RUN: %S/Inputs/idle-stdin %klee-zesti -output-dir=%t.out -only-replay-seeds -libc=uclibc -posix-runtime %t.bc abc &> %t.log
+// RUN: FileCheck --input-file=%t.log %s
+// CHECK-NOT: idle-stdin: command did not finish
+// CHECK: KLEE: done: completed paths = 1
+
+#include <stdio.h>
+#include <string.h>
+
+int main(int argc, char **argv) {
+  if (argc > 1 && strcmp(argv[1], "abc") == 0)
+    printf("Got abc\n");
+  return 0;
+}
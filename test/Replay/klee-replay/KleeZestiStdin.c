@@ -0,0 +1,31 @@
+// REQUIRES: uclibc
+// REQUIRES: posix-runtime
+// RUN: rm -rf %t.out %t.limit.out
+// RUN: %clang %s -emit-llvm %O0opt -c -o %t.bc
+
+// Binary stdin from a pipe is kept completely
+// RUN: printf 'ab\000\ncd' | %klee-zesti -output-dir=%t.out -only-replay-seeds -libc=uclibc -posix-runtime %t.bc &> %t.log
+// RUN: FileCheck --input-file=%t.log -check-prefix=CHECK-FULL %s
+// CHECK-FULL-DAG: Got 6 bytes
+// CHECK-FULL-DAG: Got NUL at 2
+// CHECK-FULL-DAG: KLEE: done: completed paths = 1
+
+// RUN: printf 'ab\000\ncd' | %klee-zesti --zesti-stdin-limit=3 -output-dir=%t.limit.out -only-replay-seeds -libc=uclibc -posix-runtime %t.bc &> %t.limit.log
+// RUN: FileCheck --input-file=%t.limit.log -check-prefix=CHECK-LIMIT %s
+// CHECK-LIMIT-DAG: WARNING stdin truncated to 3 bytes
+// CHECK-LIMIT-DAG: Got 3 bytes
+
+#include <stdio.h>
+#include <unistd.h>
+
+int main(void) {
+  char buf[16];
+  ssize_t n = read(0, buf, sizeof(buf));
+
+  printf("Got %d bytes\n", (int)n);
+  for (ssize_t i = 0; i < n; ++i)
+    if (buf[i] == '\0')
+      printf("Got NUL at %d\n", (int)i);
+
+  return 0;
+}
@@ -0,0 +1,23 @@
+// REQUIRES: sqlite3
+// RUN: %clang %s -emit-llvm %O0opt -c -o %t1.bc
+// RUN: rm -rf %t.klee-out %t.cached.klee-out %t.cache
+// RUN: %klee --output-dir=%t.klee-out --persistent-query-cache=%t.cache %t1.bc 2>&1 | FileCheck %s
+// RUN: %sqlite3 %t.cache "SELECT COUNT(*) > 0 FROM queries;" | FileCheck --check-prefix=CHECK-DB %s
+// The second run gets all its results from the cache
+// RUN: %klee --output-dir=%t.cached.klee-out --persistent-query-cache=%t.cache --debug-assignment-validating-solver %t1.bc 2>&1 | FileCheck %s
+// RUN: %klee-stats --print-columns 'QPCacheHits,QPCacheMisses' --table-format=csv %t.klee-out | FileCheck --check-prefix=CHECK-FIRST %s
+// RUN: %klee-stats --print-columns 'QPCacheHits,QPCacheMisses' --table-format=csv %t.cached.klee-out | FileCheck --check-prefix=CHECK-CACHED %s
+
+#include "ExerciseSolver.c.inc"
+
+// CHECK: KLEE: Using persistent query cache
+// CHECK: KLEE: done: completed paths = 15
+// CHECK: KLEE: done: partially completed paths = 0
+
+// CHECK-DB: 1
+
+// CHECK-FIRST: QPCacheHits,QPCacheMisses
+// CHECK-FIRST-NEXT: {{[0-9]+}},{{[1-9][0-9]*}}
+
+// CHECK-CACHED: QPCacheHits,QPCacheMisses
+// CHECK-CACHED-NEXT: {{[1-9][0-9]*}},0
@@ -0,0 +1,43 @@
+// RUN: %clang %s -emit-llvm %O0opt -c -o %t.bc
+// RUN: rm -rf %t.campaign %t.json
+// RUN: echo '{"targets": [{"name": "loop", "bitcode": "%t.bc"}], "budget": "2s",' > %t.json
+// RUN: echo ' "configs": [{"name": "dfs", "klee_args": ["-search=dfs"]}, {"name": "bfs", "klee_args": ["-search=bfs"]}]}' >> %t.json
+// RUN: %klee-campaign --klee=%klee --jobs=1 --poll=0.1 -o %t.campaign %t.json | FileCheck %s
+// CHECK: started loop/dfs
+// CHECK: loop/dfs budget (exit code 0)
+// CHECK: started loop/bfs
+// CHECK: loop/bfs budget (exit code 0)
+
+// RUN: FileCheck -check-prefix=CHECK-MANIFEST -input-file=%t.campaign/manifest.json %s
+// CHECK-MANIFEST: "target": "loop"
+// CHECK-MANIFEST: "config": "dfs"
+// CHECK-MANIFEST: "status": "budget"
+// CHECK-MANIFEST: "config": "bfs"
+// CHECK-MANIFEST: "status": "budget"
+
+// RUN: %klee-stats --table-format=csv %t.campaign/manifest.json | FileCheck -check-prefix=CHECK-STATS %s
+// CHECK-STATS: Path,Instrs
+// CHECK-STATS-DAG: bfs,
+// CHECK-STATS-DAG: dfs,
+
+// a missing klee fails every job instead of the whole campaign
+// RUN: rm -rf %t.missing
+// RUN: not %klee-campaign --klee=%t.missing/klee --jobs=1 --poll=0.1 -o %t.missing %t.json | FileCheck -check-prefix=CHECK-MISSING %s
+// RUN: FileCheck -check-prefix=CHECK-MISSING-MANIFEST -input-file=%t.missing/manifest.json %s
+// CHECK-MISSING: loop/dfs failed (cannot run {{.*}}missing/klee: No such file or directory)
+// CHECK-MISSING: loop/bfs failed (cannot run {{.*}}missing/klee: No such file or directory)
+// CHECK-MISSING-MANIFEST: "status": "failed",
+// CHECK-MISSING-MANIFEST-NEXT: "error": "cannot run
+// CHECK-MISSING-MANIFEST: "status": "failed",
+// CHECK-MISSING-MANIFEST-NEXT: "error": "cannot run
+
+#include "klee/klee.h"
+
+int main(void) {
+  unsigned n;
+  klee_make_symbolic(&n, sizeof(n), "n");
+  // keep KLEE busy until it is stopped
+  for (unsigned i = 0; i < n; ++i)
+    ;
+  return 0;
+}
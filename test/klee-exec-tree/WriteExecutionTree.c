@@ -8,6 +8,16 @@
 // RUN: %klee-exec-tree tree-dot %t.klee-out | FileCheck --check-prefix=CHECK-DOT %s
 // RUN: %klee-exec-tree tree-info %t.klee-out | FileCheck --check-prefix=CHECK-TINFO %s
 // RUN: not %klee-exec-tree dot %t.klee-out/exec-tree-doesnotexist.db
+// RUN: %klee-stats --print-columns 'ExecTreeQueue' --table-format=csv %t.klee-out | FileCheck --check-prefix=CHECK-STATS %s
+
+// Writing the nodes without the background thread gives the same tree
+// RUN: rm -rf %t.sync.klee-out
+// RUN: %klee -write-exec-tree --exec-tree-queue-size=0 --exec-tree-batch-size=1 --output-dir=%t.sync.klee-out %t.bc
+// RUN: %klee-exec-tree tree-info %t.sync.klee-out | FileCheck --check-prefix=CHECK-TINFO %s
+// RUN: %klee-exec-tree branches %t.sync.klee-out/exec_tree.db | FileCheck --check-prefix=CHECK-BRANCH %s
+
+// CHECK-STATS: ExecTreeQueue
+// CHECK-STATS-NEXT: {{^[0-9]+$}}
 
 #include "klee/klee.h"
 
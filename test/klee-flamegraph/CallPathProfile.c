@@ -0,0 +1,32 @@
+// RUN: %clang %s -emit-llvm -g %O0opt -c -o %t.bc
+// RUN: rm -rf %t.klee-out
+// RUN: %klee --output-dir=%t.klee-out --output-call-path-profile %t.bc 2> %t.log
+// RUN: FileCheck --input-file=%t.klee-out/run.callpaths --check-prefix=CHECK-PROFILE %s
+// RUN: %klee-flamegraph --folded --metric forks %t.klee-out | FileCheck --check-prefix=CHECK-FOLDED %s
+// RUN: rm -rf %t.klee-out
+// RUN: not %klee --output-dir=%t.klee-out --output-call-path-profile --output-istats=false %t.bc 2>&1 | FileCheck --check-prefix=CHECK-ERROR %s
+
+// CHECK-PROFILE: version: 1
+// CHECK-PROFILE: events: Calls Instructions Forks SolverTime(us) States
+// CHECK-PROFILE-DAG: {{^}}[[MAIN:[0-9]+]] {{[0-9]+}} 1 {{[0-9]+}} {{[0-9]+}} {{[0-9]+}} {{[0-9]+}} main{{$}}
+// CHECK-PROFILE-DAG: {{^}}{{[0-9]+}} [[MAIN]] {{[0-9]+}} {{[0-9]+}} {{[0-9]+}} {{[0-9]+}} {{[0-9]+}} check{{$}}
+
+// CHECK-FOLDED: {{^}}main;check 2{{$}}
+
+// CHECK-ERROR: --output-call-path-profile requires --output-istats
+
+#include "klee/klee.h"
+
+int check(int x) {
+  if (x > 10)
+    return 1;
+  if (x < -10)
+    return 2;
+  return 0;
+}
+
+int main(void) {
+  int x;
+  klee_make_symbolic(&x, sizeof(x), "x");
+  return check(x);
+}
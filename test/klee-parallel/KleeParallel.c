@@ -0,0 +1,44 @@
+// REQUIRES: sqlite3
+// RUN: %clang %s -emit-llvm -g %O0opt -c -o %t.bc
+// RUN: rm -rf %t.klee-out
+// RUN: %klee --output-dir=%t.klee-out --shard-depth=2 %t.bc 2> %t.log
+// RUN: sort %t.klee-out/frontier | FileCheck --check-prefix=CHECK-FRONTIER %s
+// RUN: not %klee --output-dir=%t.klee-out2 --shard-depth=2 --shard-prefix=%t.klee-out/frontier %t.bc 2>&1 | FileCheck --check-prefix=CHECK-COMBINED %s
+// RUN: rm -rf %t.parallel-out
+// RUN: %klee-parallel -j 2 --shard-depth 1 --output-dir %t.parallel-out -- %t.bc 2> %t.parallel.log
+// RUN: FileCheck --input-file=%t.parallel-out/info --check-prefix=CHECK-INFO %s
+// RUN: ls %t.parallel-out | FileCheck --check-prefix=CHECK-TESTS %s
+// RUN: %klee-stats --print-columns 'Instrs,ICov(%)' --table-format=csv %t.parallel-out | FileCheck --check-prefix=CHECK-STATS %s
+
+// CHECK-FRONTIER: {{^}}0 0{{$}}
+// CHECK-FRONTIER-NEXT: {{^}}0 1{{$}}
+// CHECK-FRONTIER-NEXT: {{^}}1 0{{$}}
+// CHECK-FRONTIER-NEXT: {{^}}1 1{{$}}
+
+// CHECK-COMBINED: --shard-depth cannot be combined with --shard-prefix
+
+// CHECK-INFO: klee-parallel: 3 processes, 2 shards handed over
+// CHECK-INFO: KLEE: done: completed paths = 8
+// CHECK-INFO: KLEE: done: generated tests = 8
+
+// CHECK-TESTS: test000008.ktest
+// CHECK-TESTS-NOT: test000009.ktest
+
+// CHECK-STATS: Instrs,ICov(%)
+// CHECK-STATS-NEXT: {{[1-9][0-9]*}},100.00
+
+#include "klee/klee.h"
+
+int main(void) {
+  int a, b, c, r = 0;
+  klee_make_symbolic(&a, sizeof(a), "a");
+  klee_make_symbolic(&b, sizeof(b), "b");
+  klee_make_symbolic(&c, sizeof(c), "c");
+  if (a > 0)
+    r += 1;
+  if (b > 0)
+    r += 2;
+  if (c > 0)
+    r += 4;
+  return r;
+}
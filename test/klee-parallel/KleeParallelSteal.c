@@ -0,0 +1,35 @@
+// REQUIRES: sqlite3
+// RUN: %clang %s -emit-llvm -g %O0opt -c -o %t.bc
+// RUN: rm -rf %t.klee-out
+// RUN: not %klee-parallel -j 2 --output-dir %t.klee-out -- --max-donated-states=4 %t.bc 2>&1 | FileCheck --check-prefix=CHECK-RESERVED %s
+//
+// One shard finishes at once, the other one is asked to hand over states
+// whenever the first worker slot is idle. Each request yields a single state,
+// so the number of processes stays far below the number of paths.
+// RUN: rm -rf %t.parallel-out
+// RUN: %klee-parallel -j 2 --shard-depth 1 --steal-interval 0.2 --output-dir %t.parallel-out -- %t.bc 2> %t.parallel.log
+// RUN: FileCheck --input-file=%t.parallel-out/info --check-prefix=CHECK-INFO %s
+
+// CHECK-RESERVED: --max-donated-states=4 cannot be passed to klee-parallel
+
+// CHECK-INFO: klee-parallel: {{([3-9]|[1-5][0-9])}} processes
+// CHECK-INFO: KLEE: done: completed paths = 1025
+// CHECK-INFO: KLEE: done: generated tests = 1025
+
+#include "klee/klee.h"
+
+int main(void) {
+  int a;
+  klee_make_symbolic(&a, sizeof(a), "a");
+  if (a == 0)
+    return 0;
+
+  int r = 0;
+  for (int i = 0; i < 10; ++i) {
+    int b;
+    klee_make_symbolic(&b, sizeof(b), "b");
+    if (b > 0)
+      r += 1 << i;
+  }
+  return r;
+}
@@ -0,0 +1,34 @@
+// RUN: %clang %s -emit-llvm -g %O0opt -c -o %t.bc
+// RUN: rm -rf %t.klee-out %t.copy.stats
+// RUN: %klee --output-dir=%t.klee-out --stats-write-after-instructions=1 %t.bc 2> %t.log
+// RUN: %klee-stats --print-columns 'Instrs,ICov(%),MaxMem(MiB),AvgMem(MiB),MaxActiveStates,AvgActiveStates' --table-format=csv %t.klee-out > %t.before
+//
+// compact a copy
+// RUN: %klee-stats-compact --recent=0 --resolution=0.001 -o %t.copy.stats %t.klee-out | FileCheck -check-prefix=CHECK-KEPT %s
+// RUN: not %klee-stats-compact -o %t.copy.stats %t.klee-out 2>&1 | FileCheck -check-prefix=CHECK-EXISTS %s
+//
+// compact in place, twice
+// RUN: %klee-stats-compact --recent=0 --resolution=0.001 %t.klee-out | FileCheck -check-prefix=CHECK-KEPT %s
+// RUN: %klee-stats-compact --recent=0 --resolution=0.001 %t.klee-out | FileCheck -check-prefix=CHECK-KEPT %s
+// RUN: %klee-stats --print-columns 'Instrs,ICov(%),MaxMem(MiB),AvgMem(MiB),MaxActiveStates,AvgActiveStates' --table-format=csv %t.klee-out > %t.after
+// RUN: diff %t.before %t.after
+//
+// RUN: not %klee-stats-compact --resolution=0 %t.klee-out 2>&1 | FileCheck -check-prefix=CHECK-RESOLUTION %s
+
+// CHECK-KEPT: kept {{[1-9][0-9]*}} of {{[1-9][0-9]*}} rows
+// CHECK-EXISTS: Error: {{.*}}.copy.stats already exists
+// CHECK-RESOLUTION: Error: --recent must not be negative and --resolution must be positive
+
+#include "klee/klee.h"
+
+int main(void) {
+  int n;
+  klee_make_symbolic(&n, sizeof(n), "n");
+  klee_assume(n >= 0);
+  klee_assume(n < 8);
+
+  int sum = 0;
+  for (int i = 0; i < n; ++i)
+    sum += i;
+  return sum;
+}
@@ -0,0 +1,61 @@
+// REQUIRES: numpy
+// RUN: %clang %s -emit-llvm -g %O0opt -c -o %t.a.bc
+// RUN: %clang %s -emit-llvm -g %O0opt -DEXTRA -c -o %t.b.bc
+// RUN: rm -rf %t.a1.klee-out %t.a2.klee-out %t.a3.klee-out %t.b1.klee-out %t.b2.klee-out %t.b3.klee-out
+// RUN: %klee --output-dir=%t.a1.klee-out %t.a.bc 2> %t.log
+// RUN: %klee --output-dir=%t.a2.klee-out %t.a.bc 2> %t.log
+// RUN: %klee --output-dir=%t.a3.klee-out %t.a.bc 2> %t.log
+// RUN: %klee --output-dir=%t.b1.klee-out %t.b.bc 2> %t.log
+// RUN: %klee --output-dir=%t.b2.klee-out %t.b.bc 2> %t.log
+// RUN: %klee --output-dir=%t.b3.klee-out %t.b.bc 2> %t.log
+//
+// RUN: %klee-stats compare --table-format=csv --print-columns 'Instrs,ICount' %t.a1.klee-out %t.a2.klee-out %t.a3.klee-out -- %t.b1.klee-out %t.b2.klee-out %t.b3.klee-out | FileCheck -check-prefix=CHECK-AB %s
+// RUN: not %klee-stats compare --fail-on-significant --print-columns 'Instrs' %t.a1.klee-out %t.a2.klee-out %t.a3.klee-out -- %t.b1.klee-out %t.b2.klee-out %t.b3.klee-out
+//
+// Runs of the same program differ in their timing columns only by chance
+// RUN: %klee-stats compare --fail-on-significant --table-format=csv %t.a1.klee-out %t.a2.klee-out %t.a3.klee-out -- %t.a1.klee-out %t.a2.klee-out %t.a3.klee-out > %t.aa
+// RUN: FileCheck -input-file=%t.aa -check-prefix=CHECK-AA %s
+// RUN: FileCheck -input-file=%t.aa -check-prefix=CHECK-NOT-SIGNIFICANT %s
+// RUN: %klee-stats compare --table-format=csv %t.a1.klee-out -- %t.a2.klee-out 2>&1 | FileCheck -check-prefix=CHECK-AA-SINGLE %s
+// RUN: not %klee-stats compare --fail-on-significant %t.a1.klee-out -- %t.a2.klee-out 2>&1 | FileCheck -check-prefix=CHECK-FAIL-SINGLE %s
+//
+// RUN: not %klee-stats compare %t.a1.klee-out %t.b1.klee-out 2>&1 | FileCheck -check-prefix=CHECK-SEPARATOR %s
+// RUN: not %klee-stats compare --print-columns 'Instrs,Foo' %t.a1.klee-out -- %t.b1.klee-out 2>&1 | FileCheck -check-prefix=CHECK-COLUMN %s
+
+// CHECK-AB: Column,A,IQR(A),B,IQR(B),Change(%),CILow(%),CIHigh(%),Sig
+// CHECK-AB: Instrs,{{[0-9.]+}},0.00,{{[0-9.]+}},0.00,{{[0-9.]+}},{{[0-9.]+}},{{[0-9.]+}},*
+// CHECK-AB: ICount,{{[0-9.]+}},0.00,{{[0-9.]+}},0.00,{{[0-9.]+}},{{[0-9.]+}},{{[0-9.]+}},*
+
+// CHECK-AA: Instrs,{{[0-9.]+}},0.00,{{[0-9.]+}},0.00,0.00,0.00,0.00,{{$}}
+// CHECK-AA: Time(s),
+// CHECK-AA: TUser(s),
+
+// CHECK-NOT-SIGNIFICANT: Column,A,IQR(A),B,IQR(B),Change(%),CILow(%),CIHigh(%),Sig
+// CHECK-NOT-SIGNIFICANT-NOT: *
+
+// CHECK-AA-SINGLE: Warning: fewer than 3 runs in a group, no change is flagged as significant
+// CHECK-AA-SINGLE: Column,A,IQR(A),B,IQR(B),Change(%),CILow(%),CIHigh(%),Sig
+// CHECK-AA-SINGLE-NOT: *
+
+// CHECK-FAIL-SINGLE: Error: --fail-on-significant requires at least 3 runs per group
+
+// CHECK-SEPARATOR: error: the output directories of the groups must be separated by --
+// CHECK-COLUMN: Column(s) not found: Foo
+
+#include "klee/klee.h"
+
+int main(void) {
+  int n;
+  klee_make_symbolic(&n, sizeof(n), "n");
+  klee_assume(n >= 0);
+  klee_assume(n < 4);
+
+  int sum = 0;
+  for (int i = 0; i < n; ++i)
+    sum += i;
+#ifdef EXTRA
+  for (int i = 0; i < 100; ++i)
+    sum ^= i;
+#endif
+  return sum;
+}
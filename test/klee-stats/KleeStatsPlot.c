@@ -0,0 +1,36 @@
+// REQUIRES: matplotlib
+// RUN: %clang %s -emit-llvm -g %O0opt -c -o %t.bc
+// RUN: rm -rf %t.klee-out %t.klee-out2
+// RUN: %klee --output-dir=%t.klee-out --stats-write-after-instructions=1 %t.bc 2> %t.log
+// RUN: %klee --output-dir=%t.klee-out2 --stats-write-after-instructions=1 --search=bfs %t.bc 2> %t.log
+// RUN: %klee-stats plot -o %t.svg --width=20 %t.klee-out %t.klee-out2
+// RUN: FileCheck -input-file=%t.svg %s
+// RUN: %klee-stats plot -o %t.png --columns='Instrs,TUser(%)' %t.klee-out
+// RUN: test -s %t.png
+// RUN: not %klee-stats plot -o %t.svg --columns='ICov(%),Foo' %t.klee-out 2>&1 | FileCheck -check-prefix=CHECK-COLUMN %s
+
+// CHECK: <svg
+// CHECK-DAG: ICov(%)
+// CHECK-DAG: BCov(%)
+// CHECK-DAG: ActiveStates
+// CHECK-DAG: Mem(MiB)
+// CHECK-DAG: TSolver(%)
+// CHECK-DAG: .klee-out2
+// CHECK: </svg>
+
+// CHECK-COLUMN: Column(s) not found: Foo
+
+#include "klee/klee.h"
+
+int main(void) {
+  int n;
+  klee_make_symbolic(&n, sizeof(n), "n");
+  klee_assume(n >= 0);
+  klee_assume(n < 8);
+
+  int sum = 0;
+  for (int i = 0; i < n; ++i)
+    if (i % 2)
+      sum += i;
+  return sum;
+}
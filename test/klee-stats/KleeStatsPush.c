@@ -0,0 +1,48 @@
+// RUN: %clang %s -emit-llvm -g %O0opt -c -o %t.bc
+// RUN: rm -rf %t.klee-out %t.fifo.klee-out
+// RUN: %klee --output-dir=%t.klee-out --stats-push=socket %t.bc 2> %t.log
+// RUN: test ! -e %t.klee-out/run.stats.sock
+// RUN: %klee --output-dir=%t.fifo.klee-out --stats-push=fifo %t.bc 2> %t.fifo.log
+// RUN: test ! -e %t.fifo.klee-out/run.stats.fifo
+// finished runs are read from run.stats
+// RUN: %klee-stats --follow --print-columns 'Path,Instrs' --table-format=csv %t.klee-out > %t.stats
+// RUN: FileCheck -input-file=%t.stats %s
+//
+// while KLEE runs, its rows arrive as JSON and are printed once per second;
+// only the last table is read from run.stats after the terminal record
+// RUN: %clang %s -DLIVE -emit-llvm -g %O0opt -c -o %t.live.bc
+// RUN: rm -rf %t.live.klee-out
+// RUN: sh -c '%klee --output-dir=%t.live.klee-out --stats-push=fifo --stats-write-interval=100ms --max-time=4s --write-no-tests %t.live.bc 2> %t.live.log & for i in $(seq 100); do test -p %t.live.klee-out/run.stats.fifo && break; sleep 0.1; done; %klee-stats --follow --print-columns "Path,Instrs" --table-format=csv %t.live.klee-out > %t.live.stats 2> %t.live.err; wait'
+// RUN: FileCheck -input-file=%t.live.stats -check-prefix=CHECK-LIVE %s
+// RUN: FileCheck -input-file=%t.live.err -allow-empty -check-prefix=CHECK-LIVE-ERR %s
+// RUN: test ! -e %t.live.klee-out/run.stats.fifo
+
+// CHECK: Path,Instrs
+// CHECK-NEXT: {{.*}}klee-out,{{[1-9][0-9]*}}
+
+// CHECK-LIVE: Path,Instrs
+// CHECK-LIVE-NEXT: {{.*}}live.klee-out,{{[1-9][0-9]*}}
+// CHECK-LIVE: Path,Instrs
+// CHECK-LIVE-NEXT: {{.*}}live.klee-out,{{[1-9][0-9]*}}
+// CHECK-LIVE: Path,Instrs
+// CHECK-LIVE-NEXT: {{.*}}live.klee-out,{{[1-9][0-9]*}}
+// CHECK-LIVE-ERR-NOT: Warning
+
+#include "klee/klee.h"
+
+int main(void) {
+  int x;
+  klee_make_symbolic(&x, sizeof(x), "x");
+#ifdef LIVE
+  // keeps KLEE busy until -max-time
+  for (int i = 0; i < 24; ++i) {
+    int b;
+    klee_make_symbolic(&b, sizeof(b), "b");
+    if (b)
+      x += i;
+  }
+#endif
+  if (x > 10)
+    return 1;
+  return 0;
+}
@@ -16,6 +16,7 @@
 #include "klee/Expr/Expr.h"
 #include "klee/Solver/SolverCmdLine.h"
 #include "klee/Statistics/Statistics.h"
+#include "klee/Support/AsyncFileWriter.h"
 #include "klee/Support/Debug.h"
 #include "klee/Support/ErrorHandling.h"
 #include "klee/Support/FileHandling.h"
@@ -59,6 +60,7 @@ DISABLE_WARNING_POP
 #include <unistd.h>
 
 #include <cerrno>
+#include <cstdlib>
 #include <ctime>
 #include <fstream>
 #include <iomanip>
@@ -128,6 +130,19 @@ namespace {
                 cl::desc("Write .sym.path files for each test case (default=false)"),
                 cl::cat(TestCaseCat));
 
+  cl::opt<unsigned> TestWriterQueue(
+      "test-writer-queue", cl::init(1024),
+      cl::desc("Maximum number of test files waiting to be written by a "
+               "background thread. 0 writes them while exploring "
+               "(default=1024)"),
+      cl::cat(TestCaseCat));
+
+  cl::opt<bool> WriteTestArchive(
+      "write-test-archive", cl::init(false),
+      cl::desc("Write the test files into a single tar archive (tests.tar) "
+               "instead of separate files (default=false)"),
+      cl::cat(TestCaseCat));
+
 
   /*** Startup options ***/
 
@@ -258,6 +273,18 @@ namespace {
                  cl::value_desc("path file"),
                  cl::cat(ReplayCat));
 
+  cl::opt<std::string>
+  ShardPrefixFile("shard-prefix",
+                  cl::desc("Take the choices in the given file (a line of the "
+                           "frontier file written with --shard-depth) at the "
+                           "splits of the state space and explore only the "
+                           "subtree they lead to.  On SIGUSR1, the "
+                           "shallowest states are written to the frontier "
+                           "file, as many as --max-donated-states "
+                           "(see klee-parallel)"),
+                  cl::value_desc("prefix file"),
+                  cl::cat(ReplayCat));
+
 
 
   cl::list<std::string>
@@ -329,6 +356,7 @@ private:
   Interpreter *m_interpreter;
   TreeStreamWriter *m_pathWriter, *m_symPathWriter;
   std::unique_ptr<llvm::raw_ostream> m_infoFile;
+  std::unique_ptr<AsyncFileWriter> m_testWriter;
 
   SmallString<128> m_outputDirectory;
 
@@ -353,6 +381,12 @@ public:
   void incPathsCompleted() { ++m_pathsCompleted; }
   void incPathsExplored(std::uint32_t num = 1) {
     m_pathsExplored += num; }
+  std::uint64_t getTestQueueDepth() const override {
+    return m_testWriter->getQueueDepth();
+  }
+  std::uint64_t getTestWriteTime() const override {
+    return m_testWriter->getWriteTime().toMicroseconds();
+  }
 
   void setInterpreter(Interpreter *i);
 
@@ -372,12 +406,17 @@ public:
   std::string getOutputFilename(const std::string &filename);
   std::unique_ptr<llvm::raw_fd_ostream> openOutputFile(const std::string &filename);
   std::string getTestFilename(const std::string &suffix, unsigned id);
-  std::unique_ptr<llvm::raw_fd_ostream> openTestFile(const std::string &suffix, unsigned id);
+  void writeTestFile(const std::string &suffix, unsigned id,
+                     std::string contents);
 
   // load a .path file
   static void loadPathFile(std::string name,
                            std::vector<bool> &buffer);
 
+  // load the choices of a shard prefix
+  static void loadShardPrefix(const std::string &name,
+                              std::vector<std::uint32_t> &prefix);
+
   static void getKTestFilesInDir(std::string directoryPath,
                                  std::vector<std::string> &results);
 
@@ -458,9 +497,16 @@ KleeHandler::KleeHandler(int argc, char **argv)
 
   // open info
   m_infoFile = openOutputFile("info");
+
+  m_testWriter = std::make_unique<AsyncFileWriter>(
+      m_outputDirectory.c_str(),
+      WriteTestArchive ? getOutputFilename("tests.tar") : "",
+      TestWriterQueue);
 }
 
 KleeHandler::~KleeHandler() {
+  // write the remaining tests
+  m_testWriter.reset();
   delete m_pathWriter;
   delete m_symPathWriter;
   fclose(klee_warning_file);
@@ -510,9 +556,9 @@ std::string KleeHandler::getTestFilename(const std::string &suffix, unsigned id)
   return filename.str();
 }
 
-std::unique_ptr<llvm::raw_fd_ostream>
-KleeHandler::openTestFile(const std::string &suffix, unsigned id) {
-  return openOutputFile(getTestFilename(suffix, id));
+void KleeHandler::writeTestFile(const std::string &suffix, unsigned id,
+                                std::string contents) {
+  m_testWriter->write(getTestFilename(suffix, id), std::move(contents));
 }
 
 bool KleeHandler::writeTestCaseKTest(
@@ -535,8 +581,12 @@ bool KleeHandler::writeTestCaseKTest(
     std::copy(out[i].second.begin(), out[i].second.end(), o->bytes);
   }
   bool status = true;
-  if (!kTest_toFile(&b,
-                    getOutputFilename(getTestFilename("ktest", id)).c_str())) {
+  char *buffer;
+  size_t size;
+  if (kTest_toBuffer(&b, &buffer, &size)) {
+    writeTestFile("ktest", id, std::string(buffer, size));
+    free(buffer);
+  } else {
     status = false;
     klee_warning("unable to write output test case, losing it");
   }
@@ -554,9 +604,8 @@ void KleeHandler::writeTestCaseXML(
 
   // TODO: This is super specific to test-comp and assumes that the name is the
   // type information
-  auto file = openTestFile("xml", id);
-  if (!file)
-    return;
+  std::string contents;
+  auto file = std::make_unique<llvm::raw_string_ostream>(contents);
 
   *file << "<?xml version=\"1.0\" encoding=\"UTF-8\" standalone=\"no\"?>\n";
   *file << "<!DOCTYPE testcase PUBLIC \"+//IDN sosy-lab.org//DTD test-format "
@@ -604,6 +653,7 @@ void KleeHandler::writeTestCaseXML(
     *file << "</input>\n";
   }
   *file << "</testcase>\n";
+  writeTestFile("xml", id, std::move(file->str()));
 }
 
 /* Outputs all files (.ktest, .kquery, .cov etc.) describing a test case */
@@ -634,22 +684,19 @@ void KleeHandler::processTestCase(const ExecutionState &state,
       }
     }
 
-    if (errorMessage) {
-      auto f = openTestFile(errorSuffix, test_id);
-      if (f)
-        *f << errorMessage;
-    }
+    if (errorMessage)
+      writeTestFile(errorSuffix, test_id, errorMessage);
 
     if (m_pathWriter) {
       std::vector<unsigned char> concreteBranches;
       m_pathWriter->readStream(m_interpreter->getPathStreamID(state),
                                concreteBranches);
-      auto f = openTestFile("path", test_id);
-      if (f) {
-        for (const auto &branch : concreteBranches) {
-          *f << branch << '\n';
-        }
+      std::string path;
+      for (const auto &branch : concreteBranches) {
+        path += branch;
+        path += '\n';
       }
+      writeTestFile("path", test_id, std::move(path));
     }
 
     if (atLeastOneGenerated) {
@@ -659,9 +706,7 @@ void KleeHandler::processTestCase(const ExecutionState &state,
     if (errorMessage || WriteKQueries) {
       std::string constraints;
       m_interpreter->getConstraintLog(state, constraints,Interpreter::KQUERY);
-      auto f = openTestFile("kquery", test_id);
-      if (f)
-        *f << constraints;
+      writeTestFile("kquery", test_id, std::move(constraints));
     }
 
     if (WriteCVCs) {
@@ -669,42 +714,38 @@ void KleeHandler::processTestCase(const ExecutionState &state,
       // SMT-LIBv2 not CVC which is a bit confusing
       std::string constraints;
       m_interpreter->getConstraintLog(state, constraints, Interpreter::STP);
-      auto f = openTestFile("cvc", test_id);
-      if (f)
-        *f << constraints;
+      writeTestFile("cvc", test_id, std::move(constraints));
     }
 
     if (WriteSMT2s) {
       std::string constraints;
         m_interpreter->getConstraintLog(state, constraints, Interpreter::SMTLIB2);
-        auto f = openTestFile("smt2", test_id);
-        if (f)
-          *f << constraints;
+        writeTestFile("smt2", test_id, std::move(constraints));
     }
 
     if (m_symPathWriter) {
       std::vector<unsigned char> symbolicBranches;
       m_symPathWriter->readStream(m_interpreter->getSymbolicPathStreamID(state),
                                   symbolicBranches);
-      auto f = openTestFile("sym.path", test_id);
-      if (f) {
-        for (const auto &branch : symbolicBranches) {
-          *f << branch << '\n';
-        }
+      std::string path;
+      for (const auto &branch : symbolicBranches) {
+        path += branch;
+        path += '\n';
       }
+      writeTestFile("sym.path", test_id, std::move(path));
     }
 
     if (WriteCov) {
       std::map<const std::string*, std::set<unsigned> > cov;
       m_interpreter->getCoveredLines(state, cov);
-      auto f = openTestFile("cov", test_id);
-      if (f) {
-        for (const auto &entry : cov) {
-          for (const auto &line : entry.second) {
-            *f << *entry.first << ':' << line << '\n';
-          }
+      std::string lines;
+      llvm::raw_string_ostream f(lines);
+      for (const auto &entry : cov) {
+        for (const auto &line : entry.second) {
+          f << *entry.first << ':' << line << '\n';
         }
       }
+      writeTestFile("cov", test_id, std::move(f.str()));
     }
 
     if (m_numGeneratedTests == MaxTests)
@@ -712,14 +753,16 @@ void KleeHandler::processTestCase(const ExecutionState &state,
 
     if (WriteTestInfo) {
       time::Span elapsed_time(time::getWallTime() - start_time);
-      auto f = openTestFile("info", test_id);
-      if (f)
-        *f << "Time to generate test case: " << elapsed_time << '\n';
+      std::string info;
+      llvm::raw_string_ostream f(info);
+      f << "Time to generate test case: " << elapsed_time << '\n';
+      writeTestFile("info", test_id, std::move(f.str()));
     }
   } // if (!WriteNone)
 
   if (errorMessage && OptExitOnError) {
     m_interpreter->prepareForEarlyExit();
+    m_testWriter->flush();
     klee_error("EXITING ON ERROR:\n%s\n", errorMessage);
   }
 }
@@ -741,6 +784,19 @@ void KleeHandler::loadPathFile(std::string name,
   }
 }
 
+void KleeHandler::loadShardPrefix(const std::string &name,
+                                  std::vector<std::uint32_t> &prefix) {
+  std::ifstream f(name.c_str());
+  if (!f.good())
+    klee_error("Cannot open shard prefix %s", name.c_str());
+
+  std::uint32_t choice;
+  while (f >> choice)
+    prefix.push_back(choice);
+  if (!f.eof())
+    klee_error("Invalid shard prefix %s", name.c_str());
+}
+
 void KleeHandler::getKTestFilesInDir(std::string directoryPath,
                                      std::vector<std::string> &results) {
   std::error_code ec;
@@ -1107,6 +1163,11 @@ static void interrupt_handle() {
   interrupted = true;
 }
 
+static void donate_handle(int) {
+  if (theInterpreter)
+    theInterpreter->requestDonation();
+}
+
 static void interrupt_handle_watchdog() {
   // just wait for the child to finish
 }
@@ -1319,6 +1380,9 @@ int main(int argc, char **argv, char **envp) {
   }
 
   sys::SetInterruptFunction(interrupt_handle);
+  // installed early, so that a donation request never kills the process
+  if (!ShardPrefixFile.empty())
+    signal(SIGUSR1, donate_handle);
 
   // Load the bytecode...
   std::string errorMsg;
@@ -1542,6 +1606,12 @@ int main(int argc, char **argv, char **envp) {
     interpreter->setReplayPath(&replayPath);
   }
 
+  std::vector<std::uint32_t> shardPrefix;
+  if (!ShardPrefixFile.empty()) {
+    KleeHandler::loadShardPrefix(ShardPrefixFile, shardPrefix);
+    interpreter->setShardPrefix(&shardPrefix);
+  }
+
   auto startTime = std::time(nullptr);
 
   if (WriteXMLTests) {
@@ -145,7 +145,7 @@ int main(int argc, char *argv[]) {
       memset(&file_stat[current_file], 0, sizeof(struct stat64));
 #endif
 #endif
-      if ((fp[current_file] = fopen(content_filename, "r")) == NULL ||
+      if ((fp[current_file] = fopen(content_filename, "rb")) == NULL ||
           stat64(content_filename, file_stat + current_file) < 0) {
         perror("Failed to open");
         fprintf(stderr, "Failure opening %s %p\n", content_filename,
@@ -162,13 +162,12 @@ int main(int argc, char *argv[]) {
         exit(1);
       }
 
-      int read_char;
-      unsigned char *fptr;
-      fptr = file_content[current_file];
-      while ((read_char = fgetc(fp[current_file])) != EOF) {
-        *fptr = (unsigned char)read_char;
-        fptr++;
+      if (fread(file_content[current_file], 1, nbytes, fp[current_file]) !=
+          (size_t)nbytes) {
+        fprintf(stderr, "Failure reading %s\n", content_filename);
+        exit(1);
       }
+      fclose(fp[current_file]);
     }
     // We opened all the files, read their content and got the max size of all
     // files. Now we extend the smaller files to the max size and add them to
@@ -217,24 +216,24 @@ int main(int argc, char *argv[]) {
     memset(&file_stat, 0, sizeof(struct stat64));
 #endif
 #endif
-    if ((fp = fopen(stdin_content_filename, "r")) == NULL ||
+    if ((fp = fopen(stdin_content_filename, "rb")) == NULL ||
         stat64(stdin_content_filename, &file_stat) < 0) {
       fprintf(stderr, "Failure opening %s\n", stdin_content_filename);
       print_usage_and_exit(argv[0]);
     }
 
-    unsigned char *file_content, *fptr;
+    unsigned char *file_content;
     if ((file_content = (unsigned char *)malloc(file_stat.st_size)) == NULL) {
       fputs("Memory allocation failure\n", stderr);
       exit(1);
     }
 
-    int read_char;
-    fptr = file_content;
-    while ((read_char = fgetc(fp)) != EOF) {
-      *fptr = (unsigned char)read_char;
-      fptr++;
+    if (fread(file_content, 1, file_stat.st_size, fp) !=
+        (size_t)file_stat.st_size) {
+      fprintf(stderr, "Failure reading %s\n", stdin_content_filename);
+      exit(1);
     }
+    fclose(fp);
 
     push_obj(&b, filename, file_stat.st_size, file_content);
     push_obj(&b, statname, sizeof(struct stat64), (unsigned char *)&file_stat);
@@ -10,9 +10,47 @@
 # ===----------------------------------------------------------------------===##
 
 import os
+import multiprocessing
 import TreeGraph
 import Image
 
+# Ribbons of all paths up to the last frame, in drawing order. Set before the
+# worker pool is started so that forked workers share it.
+framePolygons = []
+
+def renderFrame(task):
+    """renderFrame(task) -> (frame, count)
+
+    Write a single frame showing the first _polygonCount_ entries of
+    framePolygons, converting it to JPG if requested.
+    """
+
+    (frame, count, polygonCount, outputDir, backend,
+     convertToJPG, convertToRGB) = task
+    frame_path = os.path.join(outputDir, 'frame_%05d.%s' % (frame, backend))
+    TreeGraph.writeTreeGraph(frame_path, framePolygons[:polygonCount], backend)
+    if not convertToJPG:
+        return frame, count
+
+    jpg_path = os.path.join(outputDir, 'frame_%05d.jpg' % frame)
+    if backend == 'png':
+        # Already rasterized, no need for ImageMagick
+        img = Image.open(frame_path)
+        img.convert('RGB').save(jpg_path, quality=100)
+        return frame, count
+
+    if not convertToRGB:
+        os.system('convert "%s" "%s"' % (frame_path, jpg_path))
+        return frame, count
+
+    jpg_tmp_path = os.path.join(outputDir, 'frame_%05d_tmp.jpg' % frame)
+    os.system('convert "%s" "%s"' % (frame_path, jpg_tmp_path))
+
+    img = Image.open(jpg_tmp_path)
+    img = img.convert('RGB')
+    img.save(jpg_path, quality=100)
+    return frame, count
+
 def main():
     from optparse import OptionParser
     op = OptionParser("usage: %prog [options] <tree-stream-path> <output-directory>")
@@ -26,6 +64,12 @@ def main():
                   action='store_true', default=False)
     op.add_option('','--convert-to-rgb', dest='convertToRGB',
                   action='store_true', default=False)
+    op.add_option('','--backend', dest='backend', type='choice',
+                  choices=['pdf', 'png', 'svg'], default='pdf',
+                  help='frame format: pdf, svg or png (default: pdf)')
+    op.add_option('-j','--jobs', dest='jobs', type=int,
+                  default=multiprocessing.cpu_count(),
+                  help='number of frames to render in parallel')
     opts,args = op.parse_args()
 
     if len(args) != 2:
@@ -35,25 +79,26 @@ def main():
     if not os.path.exists(outputDir):
         os.mkdir(outputDir)
     
-    for frame,count in enumerate(range(opts.startCount, opts.endCount,
-                                     opts.countStride)):
-        print 'generating frame %d with path count %d...' % (frame+1, count)
-        pdf_path = os.path.join(outputDir, 'frame_%05d.pdf' % frame)
-        TreeGraph.makeTreeGraph(pdf_path, symPath, count)
-        if not opts.convertToJPG:
-            continue
-
-        jpg_path = os.path.join(outputDir, 'frame_%05d.jpg' % frame)
-        if not opts.convertToRGB:
-            os.system('convert "%s" "%s"' % (pdf_path, jpg_path))
-            continue
+    # The tree is laid out once. As a path is only drawn where it differs
+    # from earlier paths, the ribbons of a frame are those of the previous
+    # frame plus the ones of the newly added paths.
+    counts = range(opts.startCount, opts.endCount, opts.countStride)
+    if not counts:
+        return
+    layout = TreeGraph.loadTreeLayout(symPath)
+    order = list(range(min(max(counts), len(layout.lengths))))
+    drawn = [0] + list((layout.lengths[order] >= 3).cumsum())
+    framePolygons[:] = layout.ribbons(order)
 
-        jpg_tmp_path = os.path.join(outputDir, 'frame_%05d_tmp.jpg' % frame)
-        os.system('convert "%s" "%s"' % (pdf_path, jpg_tmp_path))
-
-        img = Image.open(jpg_tmp_path)
-        img = img.convert('RGB')
-        img.save(jpg_path, quality=100)
+    tasks = [(frame, count, int(drawn[max(0, min(count, len(order)))]),
+              outputDir, opts.backend, opts.convertToJPG, opts.convertToRGB)
+             for frame,count in enumerate(counts)]
+    pool = multiprocessing.Pool(opts.jobs)
+    try:
+        for frame,count in pool.imap(renderFrame, tasks):
+            print('generated frame %d with path count %d' % (frame+1, count))
+    finally:
+        pool.terminate()
         
 if __name__=='__main__':
     try:
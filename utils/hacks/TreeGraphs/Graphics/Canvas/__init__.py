@@ -14,7 +14,9 @@ from __future__ import division
 
 import math, os, random
 
-from Graphics.Geometry import vec2
+import numpy as np
+
+from Graphics.Geometry import vec2, vec2array, mat3array
 
 from reportlab.pdfgen import canvas
 #from reportlab.graphics import shapes
@@ -56,6 +58,14 @@ class BaseCanvas:
 		for pt in pts:
 			self.drawPoint(pt)
 		self.endDrawPoints()
+
+	def drawLineStrips(self, strips):
+		for pts in strips:
+			self.drawLineStrip(pts)
+
+	def drawFilledPolygons(self, polys):
+		for pts in polys:
+			self.drawFilledPolygon(pts)
 		
 	def drawStringCentered(self, boxLL, boxUR, text):
 		ll,ur = self.getStringBBox(text)
@@ -70,6 +80,36 @@ class BaseCanvas:
 		ll,ur = self.getStringBBox(string)
 		return vec2.sub(ur,ll)
 	
+# Batched drawing writes PDF path operators directly, formatting whole
+# arrays of coordinates at once instead of going through one reportlab call
+# per point.
+kCircleKappa = 0.5522847498
+
+def _pathOps(op, pts):
+	pts = vec2array.asarray(pts)
+	return ('%.5f %.5f ' + op + '\n') * len(pts) % tuple(pts.ravel())
+
+def _stripOps(pts):
+	pts = vec2array.asarray(pts)
+	return _pathOps('m', pts[:1]) + _pathOps('l', pts[1:])
+
+def _polygonOps(pts):
+	pts = vec2array.asarray(pts)
+	return _pathOps('m', pts[-1:]) + _pathOps('l', pts)
+
+def _circleOps(centers, r):
+	centers = vec2array.asarray(centers)
+	k = kCircleKappa*r
+	x,y = centers[:,0:1],centers[:,1:2]
+	# start at the rightmost point and go counterclockwise in four beziers
+	coords = np.hstack((x+r, y,
+						x+r, y+k, x+k, y+r, x, y+r,
+						x-k, y+r, x-r, y+k, x-r, y,
+						x-r, y-k, x-k, y-r, x, y-r,
+						x+k, y-r, x+r, y-k, x+r, y))
+	fmt = ('%.5f %.5f m\n' + '%.5f %.5f %.5f %.5f %.5f %.5f c\n'*4)
+	return fmt * len(centers) % tuple(coords.ravel())
+
 class PdfCanvas(BaseCanvas):
 	def __init__(self, name, basePos=(300,400), baseScale=(250,250), pageSize=None):
 		self._font = 'Times-Roman'
@@ -136,11 +176,13 @@ class PdfCanvas(BaseCanvas):
 	def drawFilledCircle(self, (x, y), r):
 		self.c.circle(x, y, r, stroke=0, fill=1)
 	def drawFilledPolygon(self, pts):
-		p = self.c.beginPath()
-		p.moveTo(*pts[-1])
-		for x,y in pts:
-			p.lineTo(x,y)
-		self.c.drawPath(p, fill=1, stroke=0)
+		self.c.addLiteral(_polygonOps(pts) + 'f*')
+	def drawFilledPolygons(self, polys):
+		# Nonzero winding, so overlapping polygons of the same orientation do
+		# not cancel out.
+		ops = ''.join([_polygonOps(pts) for pts in polys])
+		if ops:
+			self.c.addLiteral(ops + 'f')
 	def drawOutlinePolygon(self, pts):
 		p = self.c.beginPath()
 		p.moveTo(* pts[0])
@@ -154,21 +196,24 @@ class PdfCanvas(BaseCanvas):
 		pass
 	def drawPoint(self, (x, y)):
 		self.c.circle(x, y, self.pointSize, stroke=0, fill=1)
+	def drawPoints(self, pts):
+		pts = vec2array.asarray(pts)
+		if len(pts):
+			self.c.addLiteral(_circleOps(pts, self.pointSize) + 'f')
 
 	def drawLine(self, a, b):
 		self.drawLines([(a,b)])
 	def drawLines(self, ptPairs):
-		p = self.c.beginPath()
-		for a,b in ptPairs:
-			p.moveTo(a[0],a[1])
-			p.lineTo(b[0],b[1])
-		self.c.drawPath(p)
+		pts = vec2array.asarray(ptPairs)
+		if len(pts):
+			fmt = '%.5f %.5f m %.5f %.5f l\n'
+			self.c.addLiteral(fmt * (len(pts)//2) % tuple(pts.ravel()) + 'S')
 	def drawLineStrip(self, pts):
-		p = self.c.beginPath()
-		p.moveTo(pts[0][0],pts[0][1])
-		for pt in pts[1:]:
-			p.lineTo(pt[0],pt[1])
-		self.c.drawPath(p)
+		self.c.addLiteral(_stripOps(pts) + 'S')
+	def drawLineStrips(self, strips):
+		ops = ''.join([_stripOps(pts) for pts in strips])
+		if ops:
+			self.c.addLiteral(ops + 'S')
 	def drawBezier(self, (p0,p1,p2,p3)):
 		self.c.bezier(*(p0+p1+p2+p3))
 		
@@ -207,9 +252,248 @@ class PdfCanvas(BaseCanvas):
 		self.c.drawText(t)
 
 	def getStringBBox(self, text):
-		font = pdfmetrics.getFont(self._font)
-		width = pdfmetrics.stringWidth(text, self._font, self.fontSize)
-		ll = (0,0)
-		ur = (width, (1.0 - font.face.ascent/2048.)*self.fontSize)
-		ur = (width, (1.0 - font.face.ascent/2048.)*self.fontSize)
-		return ll,ur
+		return _stringBBox(self._font, self.fontSize, text)
+
+def _stringBBox(fontName, fontSize, text):
+	font = pdfmetrics.getFont(fontName)
+	width = pdfmetrics.stringWidth(text, fontName, fontSize)
+	ll = (0,0)
+	ur = (width, (1.0 - font.face.ascent/2048.)*fontSize)
+	return ll,ur
+
+def _circle(centers, r, segments):
+	angles = np.arange(segments)*(2*math.pi/segments)
+	ring = vec2array.fromangle(angles, r)
+	return vec2array.asarray(centers)[:,None,:] + ring[None,:,:]
+
+class DeviceCanvas(BaseCanvas):
+	"""Base for canvases which do their own transformations, handing
+	primitives to the backend as arrays of page coordinates (in points,
+	origin at the top left).
+
+	Subclasses implement _fill(paths), _stroke(paths, closed),
+	_text(pt, text, size) and endDrawing()."""
+
+	kCircleSegments = 64
+	kPointSegments = 12
+
+	def __init__(self, name, basePos=(300,400), baseScale=(250,250), pageSize=None):
+		self.name = name
+		self._font = 'Times-Roman'
+		self.fontSize = 12
+		self.pageSize = tuple(pageSize or (612,792))
+		self.basePos = tuple(basePos)
+		self.baseScale = tuple(baseScale)
+		self.lastFontSizeSet = None
+		self.state = []
+
+		self.kLineScaleFactor = 1.95
+		self._resetState()
+
+	def _resetState(self):
+		# PDF style user space, with y pointing up
+		self.m = np.array(((1.0, 0.0, 0.0),
+						   (0.0, -1.0, 0.0),
+						   (0.0, self.pageSize[1], 1.0)))
+		self.scaleX = self.scaleY = 1
+		self.color = (0,0,0)
+		self.lineWidth = 1
+		self.pointSize = 1
+
+	def getAspect(self):
+		return 1.0,1.0
+
+	def startDrawing(self):
+		self._resetState()
+
+		self.translate((self.basePos[0] + self.baseScale[0], self.basePos[1] + self.baseScale[1]))
+		self.scale(self.baseScale)
+
+		self.setColor(0,0,0)
+		self.setLineWidth(1)
+		self.setPointSize(1)
+
+	def _devicePaths(self, paths):
+		paths = [vec2array.asarray(p) for p in paths]
+		if not paths:
+			return []
+		pts = mat3array.transform(self.m, np.concatenate(paths))
+		ends = np.cumsum([len(p) for p in paths])
+		return np.split(pts, ends[:-1])
+
+	def _deviceScale(self):
+		return math.sqrt(abs(np.linalg.det(self.m[:2,:2])))
+
+	def _deviceLineWidth(self):
+		return self.lineWidth*self._deviceScale()
+
+	def setColor(self, r, g, b):
+		self.color = (r,g,b)
+	def setLineWidth(self, width):
+		avgScale = (self.scaleX+self.scaleY)/2
+		self.lineWidth = width/(self.kLineScaleFactor*avgScale)
+	def setPointSize(self, size):
+		avgScale = (self.scaleX+self.scaleY)/2
+		self.pointSize = size/(4*avgScale)
+
+	def drawOutlineBox(self, (x0, y0), (x1, y1)):
+		self._stroke([((x0,y0),(x1,y0),(x1,y1),(x0,y1))], True)
+	def drawFilledBox(self, (x0, y0), (x1, y1)):
+		self._fill([((x0,y0),(x1,y0),(x1,y1),(x0,y1))])
+	def drawOutlineCircle(self, pt, r):
+		self._stroke(_circle([pt], r, self.kCircleSegments), True)
+	def drawFilledCircle(self, pt, r):
+		self._fill(_circle([pt], r, self.kCircleSegments))
+	def drawFilledPolygon(self, pts):
+		self._fill([pts])
+	def drawFilledPolygons(self, polys):
+		self._fill(polys)
+	def drawOutlinePolygon(self, pts):
+		self._stroke([pts], True)
+	def startDrawPoints(self):
+		pass
+	def endDrawPoints(self):
+		pass
+	def drawPoint(self, pt):
+		self.drawPoints([pt])
+	def drawPoints(self, pts):
+		pts = vec2array.asarray(pts)
+		if len(pts):
+			self._fill(_circle(pts, self.pointSize, self.kPointSegments))
+
+	def drawLine(self, a, b):
+		self.drawLines([(a,b)])
+	def drawLines(self, ptPairs):
+		self._stroke(vec2array.asarray(ptPairs).reshape(-1,2,2))
+	def drawLineStrip(self, pts):
+		self._stroke([pts])
+	def drawLineStrips(self, strips):
+		self._stroke(strips)
+	def drawBezier(self, (p0,p1,p2,p3)):
+		t = np.linspace(0, 1, 17)[:,None]
+		p0,p1,p2,p3 = [np.asarray(p, dtype=np.float64) for p in (p0,p1,p2,p3)]
+		s = 1-t
+		self._stroke([s*s*s*p0 + 3*s*s*t*p1 + 3*s*t*t*p2 + t*t*t*p3])
+
+	def pushTransform(self):
+		self.state.append( (self.m,self.scaleX,self.scaleY,
+							self.color,self.lineWidth,self.pointSize) )
+	def popTransform(self):
+		(self.m,self.scaleX,self.scaleY,
+		 self.color,self.lineWidth,self.pointSize) = self.state.pop()
+	def translate(self, offset):
+		self.m = np.dot(mat3array.asarray(mat3array.fromtranslate(offset)), self.m)
+	def rotate(self, angle):
+		self.m = np.dot(mat3array.asarray(mat3array.fromrotate(angle)), self.m)
+	def scale(self, (x, y)):
+		self.scaleX *= x
+		self.scaleY *= y
+		self.m = np.dot(mat3array.asarray(mat3array.fromscale2((x,y))), self.m)
+
+	def setFont(self, fontName):
+		self._font = {"Symbol":"Symbol",
+					 "Times":"Times-Roman"}.get(fontName,fontName)
+	def setFontSize(self, size):
+		self.lastFontSizeSet = size
+		avgScale = (self.scaleX+self.scaleY)/2
+		self.fontSize = size/(2*avgScale)
+	def drawString(self, pt, text):
+		self._text(self._devicePaths([pt])[0][0], text,
+				   self.fontSize*self._deviceScale())
+	drawOutlineString = drawString
+
+	def getStringBBox(self, text):
+		return _stringBBox(self._font, self.fontSize, text)
+
+def _svgColor(rgb):
+	return '#%02x%02x%02x' % tuple([int(round(255*max(0, min(1, c)))) for c in rgb])
+
+class SvgCanvas(DeviceCanvas):
+	"""Writes an SVG file, streaming every primitive to disk as it is
+	drawn."""
+
+	def __init__(self, name, basePos=(300,400), baseScale=(250,250), pageSize=None):
+		DeviceCanvas.__init__(self, name, basePos, baseScale, pageSize)
+		self.f = open(name, 'w')
+		w,h = self.pageSize
+		self.f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+					 '<svg xmlns="http://www.w3.org/2000/svg" version="1.1" '
+					 'width="%g" height="%g" viewBox="0 0 %g %g">\n' % (w, h, w, h))
+
+	def _pathData(self, paths, closed):
+		data = []
+		for pts in self._devicePaths(paths):
+			if not len(pts):
+				continue
+			data.append('M%.3f %.3f' % tuple(pts[0]))
+			data.append('L' + '%.3f %.3f ' * (len(pts)-1) % tuple(pts[1:].ravel()))
+			if closed:
+				data.append('Z')
+		return ''.join(data)
+
+	def _fill(self, paths):
+		d = self._pathData(paths, True)
+		if d:
+			self.f.write('<path fill="%s" d="%s"/>\n' % (_svgColor(self.color), d))
+	def _stroke(self, paths, closed=False):
+		d = self._pathData(paths, closed)
+		if d:
+			self.f.write('<path fill="none" stroke="%s" stroke-width="%.3f" '
+						 'stroke-linejoin="round" d="%s"/>\n'
+						 % (_svgColor(self.color), self._deviceLineWidth(), d))
+	def _text(self, (x, y), text, size):
+		text = text.replace('&','&amp;').replace('<','&lt;').replace('>','&gt;')
+		self.f.write('<text x="%.3f" y="%.3f" font-family="%s" font-size="%.3f" '
+					 'fill="%s">%s</text>\n'
+					 % (x, y, self._font, size, _svgColor(self.color), text))
+
+	def endDrawing(self):
+		self.f.write('</svg>\n')
+		self.f.close()
+
+class PngCanvas(DeviceCanvas):
+	"""Rasterizes directly into a PNG image. Primitives are drawn at
+	_supersample_ times the page resolution and filtered down when the image
+	is written, which anti-aliases the result."""
+
+	def __init__(self, name, basePos=(300,400), baseScale=(250,250), pageSize=None,
+				 resolution=1, supersample=4):
+		from PIL import Image, ImageDraw
+		DeviceCanvas.__init__(self, name, basePos, baseScale, pageSize)
+		self.resolution = resolution
+		self.factor = resolution*supersample
+		size = [int(math.ceil(s*self.factor)) for s in self.pageSize]
+		self.image = Image.new('RGB', size, (255,255,255))
+		self.draw = ImageDraw.Draw(self.image)
+
+	def _rgb(self):
+		return tuple([int(round(255*max(0, min(1, c)))) for c in self.color])
+
+	def _fill(self, paths):
+		rgb = self._rgb()
+		for pts in self._devicePaths(paths):
+			if len(pts) > 1:
+				self.draw.polygon((pts*self.factor).ravel().tolist(), fill=rgb)
+	def _stroke(self, paths, closed=False):
+		rgb = self._rgb()
+		width = max(1, int(round(self._deviceLineWidth()*self.factor)))
+		for pts in self._devicePaths(paths):
+			if len(pts) < 2:
+				continue
+			if closed:
+				pts = np.concatenate((pts, pts[:1]))
+			self.draw.line([tuple(pt) for pt in (pts*self.factor).tolist()],
+						   fill=rgb, width=width, joint='curve')
+	def _text(self, (x, y), text, size):
+		from PIL import ImageFont
+		self.draw.text((x*self.factor, (y - size)*self.factor), text,
+					   fill=self._rgb(), font=ImageFont.load_default())
+
+	def endDrawing(self):
+		from PIL import Image
+		size = [int(math.ceil(s*self.resolution)) for s in self.pageSize]
+		self.image.resize(size, Image.LANCZOS).save(self.name)
+
+canvasBackends = { 'pdf' : PdfCanvas,
+				   'svg' : SvgCanvas,
+				   'png' : PngCanvas }
@@ -0,0 +1,45 @@
+# ===-- mat3array.py ------------------------------------------------------===##
+# 
+#                      The KLEE Symbolic Virtual Machine
+# 
+#  This file is distributed under the University of Illinois Open Source
+#  License. See LICENSE.TXT for details.
+# 
+# ===----------------------------------------------------------------------===##
+
+# Counterparts of the mat3 operations applied to (N,3) arrays of vectors or
+# (N,2) arrays of points. Matrices use the mat3 layout (tuples of rows, with
+# vectors multiplied from the left).
+
+from __future__ import division
+import numpy as np
+
+def asarray(m):
+	return np.asarray(m, dtype=np.float64).reshape(3, 3)
+
+def mulvec3(m,vs):
+	return np.dot(vs, asarray(m))
+
+	# transform 2d points using homogeneous coordinates
+def transform(m,pts):
+	m = asarray(m)
+	res = np.dot(pts, m[:2]) + m[2]
+	return res[:,:2] / res[:,2:]
+
+def fromtranslate(offset):
+	x,y = offset
+	return ((1.0, 0.0, 0.0),
+			(0.0, 1.0, 0.0),
+			(  x,   y, 1.0))
+
+def fromscale2(scale):
+	x,y = scale
+	return ((  x, 0.0, 0.0),
+			(0.0,   y, 0.0),
+			(0.0, 0.0, 1.0))
+
+def fromrotate(angle):
+	c_a,s_a = np.cos(angle),np.sin(angle)
+	return ((c_a, s_a, 0.0),
+			(-s_a, c_a, 0.0),
+			(0.0, 0.0, 1.0))
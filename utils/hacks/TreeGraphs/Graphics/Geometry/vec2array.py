@@ -0,0 +1,62 @@
+# ===-- vec2array.py ------------------------------------------------------===##
+# 
+#                      The KLEE Symbolic Virtual Machine
+# 
+#  This file is distributed under the University of Illinois Open Source
+#  License. See LICENSE.TXT for details.
+# 
+# ===----------------------------------------------------------------------===##
+
+# Counterparts of the vec2 operations working on (N,2) NumPy arrays of
+# points. Scalar arguments (n, t) may also be given as (N,) arrays.
+
+from __future__ import division
+import numpy as np
+
+def asarray(pts):
+	return np.asarray(pts, dtype=np.float64).reshape(-1, 2)
+
+def _col(n):
+	n = np.asarray(n, dtype=np.float64)
+	if n.ndim:
+		return n[:,None]
+	return n
+
+def fromangle(angle,radius=1.):
+	angle,radius = np.asarray(angle),np.asarray(radius)
+	return np.stack((np.cos(angle)*radius, np.sin(angle)*radius), -1)
+
+def rotate90(a):
+	return np.stack((-a[:,1], a[:,0]), -1)
+
+def inv(a):		return -a
+
+def add(a,b):	return a + b
+def sub(a,b):	return a - b
+def mul(a,b):	return a * b
+def div(a,b):	return a / b
+def dot(a,b):	return a[:,0]*b[:,0] + a[:,1]*b[:,1]
+
+def addN(a,n):	return a + _col(n)
+def subN(a,n):	return a - _col(n)
+def mulN(a,n):	return a * _col(n)
+def divN(a,n):	return a / _col(n)
+
+def sqr(a):			return dot(a,a)
+def length(a):		return np.hypot(a[:,0], a[:,1])
+def avg(a,b):		return (a + b)*.5
+def distance(a,b):	return length(sub(a,b))
+
+def normalize(a):
+	return divN(a, length(a))
+
+def normalizeOrZero(a):
+	l = length(a)
+	res = np.zeros_like(a)
+	nz = l != 0
+	res[nz] = a[nz] / l[nz][:,None]
+	return res
+
+def lerp(a,b,t):
+	t = _col(t)
+	return a*(1.0-t) + b*t
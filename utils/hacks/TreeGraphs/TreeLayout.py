@@ -0,0 +1,292 @@
+#!/usr/bin/python
+
+# ===-- TreeLayout.py -----------------------------------------------------===##
+#
+#                      The KLEE Symbolic Virtual Machine
+#
+#  This file is distributed under the University of Illinois Open Source
+#  License. See LICENSE.TXT for details.
+#
+# ===----------------------------------------------------------------------===##
+
+"""Array based layout of path trees.
+
+Paths are stored as one flat byte buffer of branch decisions. Each tree level
+is processed for all paths at once: a node is identified by the integer key
+(parent rank * 2 + branch), and node ranks are obtained by sorting the unique
+keys of a level and looking them up with searchsorted. Positions, spline
+samples and the ribbon outlines drawn by TreeGraph are all computed on whole
+arrays, so the cost is a handful of NumPy calls per tree level instead of
+Python work per path and node.
+"""
+
+from __future__ import division
+
+import math
+
+import numpy as np
+
+from Graphics.Geometry import vec2array
+
+# Layout constants shared with TreeGraph.
+kRoot = (0., -.9)
+kOuterRadius = .9
+kSpanAngle = math.pi*.9
+
+def encodePaths(paths, maxDepth=None):
+    """encodePaths(paths, maxDepth=None) -> (bits, offsets, lengths)
+
+    Pack the branch strings in _paths_ into a single uint8 array of branch
+    decisions (1 for a '1' character, 0 otherwise) together with the start
+    offset and (possibly truncated) length of each path.
+    """
+
+    chunks = []
+    for p in paths:
+        if not isinstance(p, bytes):
+            p = p.encode('latin-1')
+        chunks.append(p)
+    lengths = np.fromiter((len(p) for p in chunks), dtype=np.int64,
+                          count=len(chunks))
+    offsets = np.zeros(len(chunks), dtype=np.int64)
+    if len(chunks):
+        np.cumsum(lengths[:-1], out=offsets[1:])
+    bits = (np.frombuffer(b''.join(chunks), dtype=np.uint8) ==
+            ord('1')).astype(np.uint8)
+    if maxDepth is not None:
+        lengths = np.minimum(lengths, maxDepth)
+    return bits, offsets, lengths
+
+def catmullRom(p0, p1, p2, p3, t):
+    """catmullRom(p0, p1, p2, p3, t) -> array
+
+    Evaluate Catmull-Rom segments given as (S,2) control point arrays at
+    the parameters _t_, returning an (S,len(t),2) array of samples.
+    """
+
+    t = np.asarray(t, dtype=np.float64)[None,:,None]
+    p0, p1, p2, p3 = [p[:,None,:] for p in (p0, p1, p2, p3)]
+    return 0.5 * ((        2*p1            ) +
+                  (  -p0        +   p2     ) * t +
+                  ( 2*p0 - 5*p1 + 4*p2 - p3) * t*t +
+                  (  -p0 + 3*p1 - 3*p2 + p3) * t*t*t)
+
+class TreeLayout(object):
+    """Positions of all nodes of a path tree.
+
+    The layout is computed once for every path given, independently of which
+    (and how many) paths are later drawn, so frames showing a growing number
+    of paths share the same node positions.
+
+    maxDepth is the level-of-detail cutoff: paths are truncated to at most
+    that many branches. ghostLevels controls how many levels below every node
+    reserve space for its (possibly unexplored) subtree.
+    """
+
+    def __init__(self, paths, maxDepth=None, ghostLevels=5):
+        self.bits, self.offsets, self.lengths = encodePaths(paths, maxDepth)
+        self.ghostLevels = ghostLevels
+        if len(self.lengths):
+            self.depth = int(self.lengths.max())
+        else:
+            self.depth = 0
+
+        self._rankNodes()
+        self._placeNodes()
+
+    def _rankNodes(self):
+        """Compute the unique node keys of every level and the rank of the
+        deepest node of every path."""
+
+        # Processing paths by decreasing length makes the active paths of a
+        # level a prefix of this permutation.
+        byLength = np.argsort(-self.lengths, kind='mergesort')
+        activeCounts = np.searchsorted(-self.lengths[byLength],
+                                       -np.arange(self.depth), side='left')
+        ranks = np.zeros(len(self.lengths), dtype=np.int64)
+        self.nodeKeys = []
+        for d in range(self.depth):
+            active = byLength[:activeCounts[d]]
+            keys = ranks[active]*2 + self.bits[self.offsets[active] + d]
+            uniqueKeys = np.unique(keys)
+            ranks[active] = np.searchsorted(uniqueKeys, keys)
+            self.nodeKeys.append(uniqueKeys)
+        self.leafRanks = ranks
+
+    def _subtreeIndex(self, depth, ranks, levels):
+        """Return the rank of the ancestor _levels_ above the nodes _ranks_
+        at _depth_ and the index of the nodes within that ancestor's
+        subtree."""
+
+        local = np.zeros(len(ranks), dtype=np.int64)
+        for i in range(levels):
+            keys = self.nodeKeys[depth - i][ranks]
+            local += (keys & 1) << i
+            ranks = keys >> 1
+        return ranks, local
+
+    def _placeNodes(self):
+        """Compute the horizontal order of all nodes, leaving room for the
+        subtrees of every node, and map it onto the fan shaped layout."""
+
+        M = self.ghostLevels
+        N = self.depth
+        self.nodePos = []
+        for d in range(N):
+            # Express every key of this level relative to a common ancestor
+            # level, so real nodes and the ghost slots reserved by their
+            # ancestors can be ordered together.
+            ref = max(-1, d - (M - 1))
+            nodeCount = len(self.nodeKeys[d])
+            anc, local = self._subtreeIndex(d, np.arange(nodeCount), d - ref)
+            keys = [(anc << (d - ref)) + local]
+            for j in range(1, min(M, d + 1)):
+                a = d - j
+                anc, local = self._subtreeIndex(
+                    a, np.arange(len(self.nodeKeys[a])), a - ref)
+                base = ((anc << (a - ref)) + local) << j
+                # Two ghost slots per ancestor, converging from the edges of
+                # its subtree towards the middle.
+                mid = 2**(j - 1) - .5
+                spread = mid * (1 - (j - 1)/(M - 1))
+                keys.append(base + (mid - spread))
+                keys.append(base + (mid + spread))
+            real = keys[0].astype(np.float64)
+            allKeys = np.unique(np.concatenate(keys).astype(np.float64))
+            if len(allKeys) > 1:
+                x = np.searchsorted(allKeys, real) / (len(allKeys) - 1)
+            else:
+                x = np.full(len(real), .5)
+            self.nodePos.append(self.getTreePos(d, x))
+
+    def getTreePos(self, depth, x):
+        """getTreePos(depth, x) -> array
+
+        Map the horizontal positions _x_ (in [0,1]) of nodes at _depth_ to
+        points on the page, as an (len(x),2) array.
+        """
+
+        zeroRad = math.hypot(
+            math.cos(math.pi*3/2)*kOuterRadius -
+            math.cos(math.pi*.5 + kSpanAngle)*kOuterRadius,
+            math.sin(math.pi*3/2)*kOuterRadius -
+            math.sin(math.pi*.5 + kSpanAngle)*kOuterRadius)
+        isoT = depth/max(1, self.depth - 1)
+        isoRadius = zeroRad + (kOuterRadius - zeroRad)*isoT
+        isoSpanAngle = math.pi*.1 + (math.pi*.7 - math.pi*.1)*isoT
+        angle = math.pi*.5 + (2*np.asarray(x) - 1)*isoSpanAngle
+        isoCent = (kRoot[0], kRoot[1] + isoT*kOuterRadius)
+        return vec2array.add(vec2array.fromangle(angle, isoRadius), isoCent)
+
+    def newSuffixes(self, order):
+        """newSuffixes(order) -> (skipped, points, starts)
+
+        For the paths with the given indices, drawn in that order, find how
+        many leading nodes of each path were already drawn by an earlier
+        path. Returns the skip counts together with the points from the
+        last shared node onwards (preceded by the root, which is repeated to
+        act as a spline end point), concatenated into a single (K,2) array,
+        and the start of each path within it.
+        """
+
+        order = np.asarray(order, dtype=np.int64)
+        lengths = self.lengths[order]
+        drawIndex = np.arange(len(order))
+        current = np.zeros(len(order), dtype=np.int64)
+        old = np.zeros(len(order), dtype=np.int64)
+        for d in range(self.depth - 1, -1, -1):
+            act = np.nonzero(lengths > d)[0]
+            ranks = self._ranksAt(order, act, d, current)
+            # First path in drawing order to visit each node.
+            _, first = np.unique(ranks, return_index=True)
+            firstVisitor = np.empty(len(self.nodeKeys[d]), dtype=np.int64)
+            firstVisitor[ranks[first]] = act[first]
+            old[act] += firstVisitor[ranks] != drawIndex[act]
+        skipped = np.minimum(old, lengths - 1)
+
+        # Path points are [root, root, n_0, ..., n_{L-1}]; keep them from the
+        # index of the skip count on.
+        counts = lengths + 2 - skipped
+        starts = np.zeros(len(order) + 1, dtype=np.int64)
+        np.cumsum(counts, out=starts[1:])
+        points = np.empty((starts[-1], 2))
+        for m in (0, 1):
+            sel = np.nonzero(skipped <= m)[0]
+            points[starts[sel] + m - skipped[sel]] = kRoot
+        for d in range(self.depth - 1, -1, -1):
+            act = np.nonzero(lengths > d)[0]
+            ranks = self._ranksAt(order, act, d, current)
+            sel = np.nonzero(d + 2 >= skipped[act])[0]
+            act = act[sel]
+            points[starts[act] + d + 2 - skipped[act]] = \
+                self.nodePos[d][ranks[sel]]
+        return skipped, points, starts
+
+    def _ranksAt(self, order, act, d, current):
+        """Advance _current_ (the node ranks of the paths in _order_ at level
+        d+1) to level _d_ for the active paths _act_ and return them."""
+
+        leaves = act[self.lengths[order[act]] == d + 1]
+        inner = act[self.lengths[order[act]] > d + 1]
+        current[leaves] = self.leafRanks[order[leaves]]
+        if len(inner):
+            current[inner] = self.nodeKeys[d + 1][current[inner]] >> 1
+        return current[act]
+
+    def ribbons(self, order, samples=10):
+        """ribbons(order, samples=10) -> iterator
+
+        Yield, for the paths with the given indices in drawing order, the
+        filled outline of the part of the path not already drawn by an
+        earlier path, as (K,2) arrays. Paths with fewer than three branches
+        are not drawn.
+        """
+
+        order = np.asarray(order, dtype=np.int64)
+        order = order[self.lengths[order] >= 3]
+        if not len(order):
+            return
+        skipped, points, starts = self.newSuffixes(order)
+
+        # Catmull-Rom segments between consecutive points, the end points
+        # being clamped to the path.
+        counts = np.diff(starts)
+        segCounts = counts - 2
+        segPath = np.repeat(np.arange(len(order)), segCounts)
+        segStarts = np.zeros(len(order) + 1, dtype=np.int64)
+        np.cumsum(segCounts, out=segStarts[1:])
+        i = np.arange(segStarts[-1]) - segStarts[segPath] + 1
+        base = starts[segPath] + i
+        last = starts[segPath] + counts[segPath] - 1
+        curve = catmullRom(points[base - 1], points[base], points[base + 1],
+                           points[np.minimum(base + 2, last)],
+                           np.arange(samples)/samples)
+
+        # Per path: all segment samples followed by the final point.
+        sampleCounts = segCounts*samples + 1
+        sampleStarts = np.zeros(len(order) + 1, dtype=np.int64)
+        np.cumsum(sampleCounts, out=sampleStarts[1:])
+        pts = np.empty((sampleStarts[-1], 2))
+        isLast = np.zeros(sampleStarts[-1], dtype=bool)
+        isLast[sampleStarts[1:] - 1] = True
+        pts[~isLast] = curve.reshape(-1, 2)
+        pts[isLast] = points[starts[1:] - 1]
+
+        # Offset each sample sideways, perpendicular to the direction to the
+        # next sample, by a width that tapers with depth.
+        vec = np.zeros_like(pts)
+        vec[:-1] = vec2array.sub(pts[:-1], pts[1:])
+        vec[isLast] = 0
+        degenerate = vec2array.length(vec) < .000001
+        vec[degenerate] = (1., 0.)
+        normal = vec2array.rotate90(vec2array.normalize(vec))
+        normal[degenerate] = (1., 0.)
+        samplePath = np.repeat(np.arange(len(order)), sampleCounts)
+        index = np.arange(len(pts)) - sampleStarts[samplePath]
+        width = .001 * (1. - (skipped[samplePath] + index/20.)/self.depth)
+        up = vec2array.add(pts, vec2array.mulN(normal, width))
+        down = vec2array.sub(pts, vec2array.mulN(normal, width))
+
+        for p in range(len(order)):
+            s, e = sampleStarts[p], sampleStarts[p + 1]
+            yield np.concatenate((down[s:e], up[s:e][::-1]))